@@ -1,6 +1,5 @@
 def basket_context(request):
-    basket = request.session.get("basket", {})
-    item_count = sum(basket.values())
+    item_count = request.basket.item_count
 
     return {
         "cart": {"item_count": item_count},
@@ -0,0 +1,17 @@
+from django.utils.deprecation import MiddlewareMixin
+
+from .storage import default_storage
+
+
+class BasketMiddleware(MiddlewareMixin):
+    """
+    Attach the basket to `request.basket` and persist it once per response.
+    """
+
+    def process_request(self, request):
+        request.basket = default_storage(request)
+
+    def process_response(self, request, response):
+        if hasattr(request, "basket"):
+            request.basket.update(response)
+        return response
@@ -0,0 +1,263 @@
+# basket/storage.py
+"""
+Basket storage backends, modelled on django.contrib.messages storage.
+
+BasketMiddleware attaches a storage instance to `request.basket`. Views
+change the basket in memory and the storage persists it once, while the
+response is being built, and only if something changed. Reading the
+basket never touches the session table.
+
+- CookieBasketStorage keeps the whole basket in a signed cookie.
+- CacheBasketStorage keeps it in the shared cache under a random id
+  held in a signed cookie.
+- FallbackBasketStorage (the default) uses the cookie while the basket
+  is small and moves it to the cache once it outgrows the cookie.
+
+Baskets are encoded compactly as "<version>:<id>.<qty>-<id>.<qty>…".
+"""
+import secrets
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+FORMAT_VERSION = "1"
+
+
+def encode_basket(lines):
+    return FORMAT_VERSION + ":" + "-".join(
+        f"{product_id}.{quantity}" for product_id, quantity in sorted(lines.items())
+    )
+
+
+def basket_cache_key(basket_id):
+    return f"basket:{basket_id}"
+
+
+def signed_cookie(name, value):
+    """
+    The cookie value the basket storages set (and accept) for `value`,
+    for clients built outside a request such as load-test fixtures.
+    """
+    return signing.get_cookie_signer(salt=name + f"basket.{name}").sign(value)
+
+
+def decode_basket(value):
+    """
+    Decode an encoded basket into {product_id: quantity}. Unknown versions
+    and malformed lines are dropped rather than raising.
+    """
+    version, _, body = (value or "").partition(":")
+    if version != FORMAT_VERSION:
+        return {}
+
+    lines = {}
+    for part in filter(None, body.split("-")):
+        product_id, _, quantity = part.partition(".")
+        try:
+            product_id, quantity = int(product_id), int(quantity)
+        except ValueError:
+            continue
+        if product_id > 0 and quantity > 0:
+            lines[product_id] = quantity
+    return lines
+
+
+def _product_id(value):
+    try:
+        product_id = int(value)
+    except (TypeError, ValueError):
+        return None
+    return product_id if product_id > 0 else None
+
+
+class BaseBasketStorage:
+    """
+    The basket API shared by every backend. Lines are {product_id: quantity}
+    with integer keys, loaded lazily on first access.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.request = request
+        self._lines = None
+        self.modified = False
+        super().__init__(*args, **kwargs)
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = self._load()
+        return self._lines
+
+    def __iter__(self):
+        return iter(self.lines.items())
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    @property
+    def item_count(self):
+        return sum(self.lines.values())
+
+    def as_dict(self):
+        return dict(self.lines)
+
+    def add(self, product_id, quantity=1):
+        product_id = _product_id(product_id)
+        if product_id is None or quantity <= 0:
+            return
+        self.lines[product_id] = self.lines.get(product_id, 0) + quantity
+        self.modified = True
+
+    def set(self, product_id, quantity):
+        if quantity <= 0:
+            return self.remove(product_id)
+        product_id = _product_id(product_id)
+        if product_id is None:
+            return
+        self.lines[product_id] = quantity
+        self.modified = True
+
+    def remove(self, product_id):
+        if self.lines.pop(_product_id(product_id), None) is not None:
+            self.modified = True
+
+    def clear(self):
+        if self.lines:
+            self.lines.clear()
+            self.modified = True
+
+    def update(self, response):
+        """
+        Persist the basket if it changed during this request.
+        """
+        if self.modified:
+            self._store(self.lines, response)
+
+    def _load(self):
+        """
+        Return the stored lines as {product_id: quantity}.
+        """
+        raise NotImplementedError("subclasses of BaseBasketStorage must provide a _load() method")
+
+    def _store(self, lines, response):
+        """
+        Persist `lines` (possibly empty) and return True if they were stored.
+        """
+        raise NotImplementedError("subclasses of BaseBasketStorage must provide a _store() method")
+
+    def _set_cookie(self, response, name, value):
+        response.set_signed_cookie(
+            name,
+            value,
+            salt=f"basket.{name}",
+            max_age=settings.BASKET_COOKIE_AGE,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite="Lax",
+        )
+
+    def _get_cookie(self, name):
+        return self.request.get_signed_cookie(name, default=None, salt=f"basket.{name}")
+
+    def _delete_cookie(self, response, name):
+        if name in self.request.COOKIES:
+            response.delete_cookie(name, samesite="Lax")
+
+
+class CookieBasketStorage(BaseBasketStorage):
+    """
+    Store the encoded basket in a signed cookie.
+    Baskets that would not fit in `max_cookie_size` are not stored.
+    """
+
+    cookie_name = "basket"
+    max_cookie_size = 2048
+
+    def _load(self):
+        return decode_basket(self._get_cookie(self.cookie_name))
+
+    def fits(self, lines):
+        # The signature adds a timestamp and a ~27 character hash.
+        return len(encode_basket(lines)) + 40 <= self.max_cookie_size
+
+    def _store(self, lines, response):
+        if not lines:
+            self._delete_cookie(response, self.cookie_name)
+            return True
+        if not self.fits(lines):
+            return False
+        self._set_cookie(response, self.cookie_name, encode_basket(lines))
+        return True
+
+
+class CacheBasketStorage(BaseBasketStorage):
+    """
+    Store the encoded basket in the shared cache, keyed by a random id in
+    a signed cookie. Changes are buffered for the whole request and
+    written behind in a single cache set.
+    """
+
+    cookie_name = "basket_id"
+
+    def _basket_id(self):
+        return self._get_cookie(self.cookie_name)
+
+    def _cache_key(self, basket_id):
+        return basket_cache_key(basket_id)
+
+    def _load(self):
+        basket_id = self._basket_id()
+        if not basket_id:
+            return {}
+        return decode_basket(cache.get(self._cache_key(basket_id)))
+
+    def _store(self, lines, response):
+        basket_id = self._basket_id()
+
+        if not lines:
+            if basket_id:
+                cache.delete(self._cache_key(basket_id))
+                self._delete_cookie(response, self.cookie_name)
+            return True
+
+        if not basket_id:
+            basket_id = secrets.token_urlsafe(16)
+        cache.set(self._cache_key(basket_id), encode_basket(lines), settings.BASKET_COOKIE_AGE)
+        # Re-set the cookie each time so it expires with the cache entry.
+        self._set_cookie(response, self.cookie_name, basket_id)
+        return True
+
+
+class FallbackBasketStorage(BaseBasketStorage):
+    """
+    Keep small baskets in a cookie and fall back to the cache for baskets
+    too large for it.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cookie = CookieBasketStorage(request)
+        self.cache = CacheBasketStorage(request)
+        super().__init__(request, *args, **kwargs)
+
+    def _load(self):
+        return self.cookie._load() or self.cache._load()
+
+    def _store(self, lines, response):
+        if self.cookie._store(lines, response):
+            # Drop any copy left in the cache from when the basket was larger.
+            self.cache._store({}, response)
+            return True
+        self.cookie._store({}, response)
+        return self.cache._store(lines, response)
+
+
+def default_storage(request):
+    """
+    Return the basket storage selected by settings.BASKET_STORAGE.
+    """
+    return import_string(settings.BASKET_STORAGE)(request)
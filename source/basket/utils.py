@@ -1,38 +1,92 @@
 # basket/utils.py
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from django.conf import settings
+from dataclasses import dataclass
 from decimal import Decimal
+from typing import Optional
+
 from products.models import Product, ProductSettings
 
+
+@dataclass(frozen=True)
+class BasketLine:
+    """
+    A single priced basket line.
+    """
+    product: Product
+    quantity: int
+    unit_price: Decimal
+    total: Decimal
+    discounted: bool
+
+
+@dataclass(frozen=True)
+class BasketPricing:
+    """
+    Result of pricing a basket. Shared by the basket page, checkout views
+    and order creation so the basket is only ever priced once per request.
+    """
+    products: tuple
+    total: Decimal
+    delivery_fee: Decimal
+    final_total: Decimal
+    free_delivery_applied: bool
+    remaining_for_free_delivery: Optional[Decimal]
+    item_count: int
+
+
+def parse_basket(basket):
+    """
+    Normalise a basket ({product_id: quantity}, ids as int or str) into
+    {int product_id: int quantity}, dropping malformed or empty lines.
+    """
+    quantities = {}
+    for raw_product_id, quantity in basket.items():
+        try:
+            product_id = int(raw_product_id)
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            continue
+        if quantity > 0:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
 def calculate_basket(basket):
     """
-    Returns detailed basket info including products, totals, delivery,
-    and remaining amount for free delivery.
+    Price a basket with a single bulk product lookup, so the query count
+    is constant however many lines the basket has. Pricing settings come
+    from the singleton cache.
+
+    Returns a BasketPricing with line totals, delivery fee and the
+    remaining amount needed for free delivery.
     """
-    products_list = []
+    quantities = parse_basket(basket or {})
+    products = Product.objects.in_bulk(list(quantities)) if quantities else {}
+
+    lines = []
     total = Decimal("0.00")
+    item_count = 0
 
-    for product_id, quantity in basket.items():
-        try:
-            product = Product.objects.get(pk=product_id)
-        except Product.DoesNotExist:
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if product is None:
             continue
 
-        price = product.effective_price
-        product_total = price * quantity
+        unit_price = product.effective_price
+        line_total = unit_price * quantity
+
+        lines.append(BasketLine(
+            product=product,
+            quantity=quantity,
+            unit_price=unit_price,
+            total=line_total,
+            discounted=bool(product.discount_price),
+        ))
 
-        products_list.append({
-            "product": product,
-            "quantity": quantity,
-            "total": product_total,
-            "discounted": bool(product.discount_price),
-        })
+        total += line_total
+        item_count += quantity
 
-        total += product_total
+    pricing_settings = ProductSettings.objects.get_solo()
 
-    pricing_settings = ProductSettings.objects.first()
     delivery_fee = Decimal("0.00")
     free_delivery_applied = False
     remaining_for_free_delivery = None
@@ -40,22 +94,18 @@ def calculate_basket(basket):
     if pricing_settings and pricing_settings.free_delivery_over:
         if total >= pricing_settings.free_delivery_over:
             free_delivery_applied = True
-            delivery_fee = Decimal("0.00")
         else:
-            free_delivery_applied = False
             delivery_fee = pricing_settings.delivery_fee
             remaining_for_free_delivery = pricing_settings.free_delivery_over - total
     elif pricing_settings:
         delivery_fee = pricing_settings.delivery_fee
 
-    final_total = total + delivery_fee
-
-    return {
-        "products": products_list,
-        "total": total,
-        "delivery_fee": delivery_fee,
-        "final_total": final_total,
-        "free_delivery_applied": free_delivery_applied,
-        "remaining_for_free_delivery": remaining_for_free_delivery,
-        "item_count": sum(basket.values()),
-    }
+    return BasketPricing(
+        products=tuple(lines),
+        total=total,
+        delivery_fee=delivery_fee,
+        final_total=total + delivery_fee,
+        free_delivery_applied=free_delivery_applied,
+        remaining_for_free_delivery=remaining_for_free_delivery,
+        item_count=item_count,
+    )
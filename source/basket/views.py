@@ -1,9 +1,15 @@
 # basket/views.py
+import time
+from datetime import timedelta
 from decimal import Decimal
+from django.contrib import messages
 from django.shortcuts import redirect
 from django.views.generic import TemplateView
+from django.views.decorators.cache import never_cache
+from django.utils.decorators import method_decorator
 from django.conf import settings
 from django.db import transaction
+from django.utils.timezone import now
 import stripe
 import json
 
@@ -13,13 +19,26 @@ from products.models import Product, ProductSettings
 from django.contrib.auth import get_user_model
 
 from .utils import calculate_basket
-from orders.services import create_order_from_basket
-from orders.models import Order
+from orders.reservations import InsufficientStock, release_reservations
+from orders.services import PriceChanged, create_order_from_basket
+from orders.models import Order, StockReservation
 
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
+# Checkout details copied from the session onto the order.
+CHECKOUT_DETAIL_FIELDS = (
+    "full_name",
+    "email",
+    "address_line1",
+    "address_line2",
+    "city",
+    "postal_code",
+    "country",
+)
 
+
+@method_decorator(never_cache, name="dispatch")
 class UserDetailsPageView(TemplateView):
     """
     Collect user contact and address details before Stripe checkout.
@@ -27,14 +46,7 @@ class UserDetailsPageView(TemplateView):
     template_name = 'user_details.html'
 
     def get_context_data(self, **kwargs):
-        basket = self.request.session.get('basket', {})
-        cart_info = calculate_basket(basket)
-
-        # Calculate remaining for free delivery
-        pricing_settings = cart_info.get('pricing_settings', None)
-        if pricing_settings and not cart_info['free_delivery_applied']:
-            remaining = pricing_settings.free_delivery_over - cart_info['total']
-            cart_info['remaining_for_free_delivery'] = remaining if remaining > 0 else 0
+        cart_info = calculate_basket(self.request.basket.as_dict())
 
         context = {
             "cart": cart_info,
@@ -55,12 +67,12 @@ class UserDetailsPageView(TemplateView):
         return redirect('stripe_payment')
 
 
+@method_decorator(never_cache, name="dispatch")
 class BasketPageView(TemplateView):
     template_name = 'basket.html'
 
     def get_context_data(self, **kwargs):
-        basket = self.request.session.get('basket', {})
-        basket_info = calculate_basket(basket)
+        basket_info = calculate_basket(self.request.basket.as_dict())
         context = super().get_context_data(**kwargs)
         context.update({
             "cart": basket_info,
@@ -70,29 +82,76 @@ class BasketPageView(TemplateView):
     def post(self, request, *args, **kwargs):
         action = request.POST.get('action')
         product_id = request.POST.get('product_id')
-        basket = request.session.get('basket', {})
 
         if action == 'remove':
-            basket.pop(product_id, None)
+            request.basket.remove(product_id)
         elif action == 'update':
             quantity = int(request.POST.get('quantity', 1))
-            if quantity <= 0:
-                basket.pop(product_id, None)
-            else:
-                basket[product_id] = quantity
+            request.basket.set(product_id, quantity)
 
-        request.session['basket'] = basket
         return redirect('basket')
 
 
+@method_decorator(never_cache, name="dispatch")
 class StripePaymentView(TemplateView):
     template_name = 'stripe_payment.html'
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+    def get_pending_checkout(self, basket_info, user_info):
+        """
+        Return (order, Stripe session id) from an earlier visit to this
+        page if the basket and details are unchanged and its stock is
+        still held.
+
+        Otherwise the earlier order is abandoned: its holds are released
+        and its Stripe session expired, so refreshing the page never
+        locks more stock than one basket.
+        """
+        order_id = self.request.session.get("order_id")
+        session_id = self.request.session.get("checkout_session_id")
+        if not order_id:
+            return None, None
+
+        order = Order.objects.filter(pk=order_id, status="pending").first()
+        if order is None:
+            return None, None
+
+        ordered = {
+            (item.product_id, item.quantity, item.unit_price)
+            for item in order.items.all()
+        }
+        wanted = {
+            (line.product.pk, line.quantity, line.unit_price)
+            for line in basket_info.products
+        }
+        reservations = order.reservations.all()
+        # Holds outlive the Stripe session by this much; keep a minute
+        # spare so the reused session is not about to expire.
+        session_margin = settings.STOCK_RESERVATION_MINUTES - settings.STRIPE_CHECKOUT_MINUTES + 1
+        held = reservations.filter(
+            status=StockReservation.HELD,
+            expires_at__gt=now() + timedelta(minutes=session_margin),
+        ).count()
+
+        same_details = all(
+            getattr(order, field) == user_info.get(field, "")
+            for field in CHECKOUT_DETAIL_FIELDS
+        )
 
-        basket = self.request.session.get('basket')
-        user_info = self.request.session.get('user_info')
+        if session_id and same_details and ordered == wanted and held and held == reservations.count():
+            return order, session_id
+
+        release_reservations(reservations)
+        if session_id:
+            try:
+                stripe.checkout.Session.expire(session_id)
+            except stripe.error.StripeError:
+                # Already completed or expired; its webhook handles the rest.
+                pass
+        return None, None
+
+    def get(self, request, *args, **kwargs):
+        basket = request.basket.as_dict()
+        user_info = request.session.get('user_info')
 
         if not basket or not user_info:
             return redirect("basket")
@@ -100,40 +159,59 @@ class StripePaymentView(TemplateView):
         basket_info = calculate_basket(basket)
         currency = getattr(settings, "STORE_CURRENCY", "GBP").lower()
 
+        # Refreshing the page reuses the checkout already started.
+        order, session_id = self.get_pending_checkout(basket_info, user_info)
+        if order is not None:
+            return self.render_checkout(session_id, **kwargs)
+
         # -----------------------------
-        # CREATE ORDER (PENDING)
+        # CREATE ORDER (PENDING) + RESERVE STOCK
         # -----------------------------
-        order = create_order_from_basket(
-            basket=basket,
-            user_info=user_info,
-            pricing=basket_info,
-        )
+        try:
+            order = create_order_from_basket(
+                basket=basket,
+                user_info=user_info,
+                pricing=basket_info,
+            )
+        except InsufficientStock as exc:
+            for failure in exc.failures:
+                messages.error(
+                    request,
+                    f"Sorry, only {failure.available} of {failure.title} left in stock.",
+                )
+            return redirect("basket")
+        except PriceChanged:
+            messages.error(
+                request,
+                "Some prices changed while you were checking out. Please review your basket.",
+            )
+            return redirect("basket")
 
         # Store for confirmation page
-        self.request.session["order_id"] = order.id
+        request.session["order_id"] = order.id
 
         # -----------------------------
         # STRIPE LINE ITEMS
         # -----------------------------
         line_items = []
 
-        for item in basket_info["products"]:
+        for item in basket_info.products:
             line_items.append({
                 "price_data": {
                     "currency": currency,
-                    "unit_amount": int(item["product"].effective_price * 100),
+                    "unit_amount": int(item.unit_price * 100),
                     "product_data": {
-                        "name": item["product"].title,
+                        "name": item.product.title,
                     },
                 },
-                "quantity": item["quantity"],
+                "quantity": item.quantity,
             })
 
-        if basket_info["delivery_fee"] > 0:
+        if basket_info.delivery_fee > 0:
             line_items.append({
                 "price_data": {
                     "currency": currency,
-                    "unit_amount": int(basket_info["delivery_fee"] * 100),
+                    "unit_amount": int(basket_info.delivery_fee * 100),
                     "product_data": {
                         "name": "Delivery Fee",
                     },
@@ -144,26 +222,39 @@ class StripePaymentView(TemplateView):
         # -----------------------------
         # STRIPE SESSION
         # -----------------------------
-        session = stripe.checkout.Session.create(
-            payment_method_types=["card"],
-            mode="payment",
-            line_items=line_items,
-            success_url="http://localhost:8000/checkout/success/",
-            cancel_url="http://localhost:8000/basket/",
-            metadata={
-                "order_id": str(order.id),
-                "order_reference": order.reference,
-            },
-        )
+        try:
+            session = stripe.checkout.Session.create(
+                payment_method_types=["card"],
+                mode="payment",
+                line_items=line_items,
+                success_url="http://localhost:8000/checkout/success/",
+                cancel_url="http://localhost:8000/basket/",
+                # Expire with the stock hold so Stripe never takes payment
+                # for stock that has gone back on sale.
+                expires_at=int(time.time()) + settings.STRIPE_CHECKOUT_MINUTES * 60,
+                metadata={
+                    "order_id": str(order.id),
+                    "order_reference": order.reference,
+                },
+            )
+        except stripe.error.StripeError:
+            release_reservations(order.reservations.all())
+            raise
+
+        request.session["checkout_session_id"] = session.id
+        return self.render_checkout(session.id, **kwargs)
 
+    def render_checkout(self, session_id, **kwargs):
+        context = self.get_context_data(**kwargs)
         context.update({
-            "session_id": session.id,
+            "session_id": session_id,
             "publishable_key": settings.STRIPE_PUBLISHABLE_KEY,
         })
 
-        return context
+        return self.render_to_response(context)
 
 
+@method_decorator(never_cache, name="dispatch")
 class PaymentConfirmationView(TemplateView):
     template_name = "payment_confirmation.html"
 
@@ -179,10 +270,10 @@ class PaymentConfirmationView(TemplateView):
         except Order.DoesNotExist:
             return context
 
-        # CLEAR SESSION DATA
-        for key in ("basket", "user_info", "order_id"):
+        # CLEAR BASKET AND SESSION DATA
+        self.request.basket.clear()
+        for key in ("user_info", "order_id", "checkout_session_id"):
             self.request.session.pop(key, None)
 
-        self.request.session.modified = True
         context["order"] = order
         return context
@@ -1,7 +1,9 @@
+from django.utils.functional import SimpleLazyObject
+
 from .models import Branding
 
 
 def branding_context(request):
     return {
-        "branding": Branding.objects.first(),
+        "branding": SimpleLazyObject(Branding.objects.get_solo),
     }
@@ -1,5 +1,8 @@
 from django.db import models
 
+from core.singletons import SingletonManager
+
+
 class Branding(models.Model):
     """
     Model representing the Branding information for the website.
@@ -8,6 +11,8 @@ class Branding(models.Model):
     SEO fields, and social media links for structured data.
     """
 
+    objects = SingletonManager()
+
     company_name = models.CharField(
         max_length=255,
         help_text="Full company name",
@@ -0,0 +1,7 @@
+from django.db.models.signals import post_delete, post_save
+
+from core.singletons import invalidate_singleton
+from .models import Branding
+
+post_save.connect(invalidate_singleton, sender=Branding)
+post_delete.connect(invalidate_singleton, sender=Branding)
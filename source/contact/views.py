@@ -6,7 +6,7 @@ from django.core.mail import send_mail
 from django.shortcuts import render
 from django.views.generic import TemplateView
 from django.contrib.auth.models import User
-from core.email_utils import send_email_by_context
+from core.email_utils import send_individual_emails_by_context
 
 
 
@@ -65,7 +65,7 @@ class ContactPageView(TemplateView):
             messages.error(request, "Captcha verification failed. Please try again.")
             return render(request, self.template_name, self.get_context_data())
 
-        # CAPTCHA passed — send emails
+        # CAPTCHA passed — queue emails
         subject = f"CodeBlock Contact Message from {name}"
         message_content = (
             f"Sender's Name: {name}\n"
@@ -74,20 +74,13 @@ class ContactPageView(TemplateView):
             f"Message:\n{message}"
         )
 
-        def send_email_to_user(recipient_email):
-            send_email_by_context(
-                subject=subject,
-                message=message_content,
-                recipient_list=[recipient_email],
-                context='company'
-            )
-
-        # Send to main contact address
-        send_email_to_user(settings.DEFAULT_FROM_EMAIL)
-
-        # Send to all users with email addresses
-        for user in User.objects.exclude(email="").only("email"):
-            send_email_to_user(user.email)
+        # Queue one copy for the main contact address and each user with an email
+        recipients = [settings.DEFAULT_FROM_EMAIL, *User.objects.exclude(email="").values_list("email", flat=True)]
+        send_individual_emails_by_context(
+            subject=subject,
+            message=message_content,
+            recipients=list(dict.fromkeys(recipients)),
+        )
 
         messages.success(request, "Your message has been sent successfully!")
         return render(request, self.template_name, self.get_context_data())
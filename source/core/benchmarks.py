@@ -0,0 +1,235 @@
+"""
+Benchmarks for the storefront and checkout hot paths.
+
+`manage.py run_benchmarks` seeds a throwaway test database, drives each
+scenario below a fixed number of times and reports per scenario:
+
+- latency p50/p95/p99 and mean (milliseconds);
+- throughput (operations per second, run serially);
+- queries per operation (mean and max), next to the view's QUERY_BUDGETS
+  entry where it has one.
+
+Stripe is never called: checkout sessions are stubbed.
+"""
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from basket.utils import calculate_basket
+from orders.models import Order
+from orders.services import create_order_from_basket, mark_order_as_paid
+from products.models import Product
+from . import datagen
+
+USER_INFO = {
+    "full_name": "Benchmark Shopper",
+    "email": "shopper@example.com",
+    "address_line1": "1 High Street",
+    "address_line2": "",
+    "city": "York",
+    "postal_code": "YO1 7HH",
+    "country": "United Kingdom",
+}
+
+BASKET_LINES = 5
+
+# The order scenarios create (and hold stock for) a new order on every
+# iteration, so they need far more stock than real products carry. The
+# checkout scenario reuses one order, as refreshes of the payment page do.
+SEED_STOCK = 1_000_000
+
+
+def seed(products=500, orders=200, seed=0):
+    """
+    Seed the catalogue and order history through core.datagen and return
+    the products. The same seed always produces the same data.
+    """
+    datagen.generate(products=products, orders=orders, seed=seed, stock=SEED_STOCK)
+    return list(Product.objects.order_by("pk"))
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    index = max(0, min(len(values) - 1, round(fraction * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def measure(operation, iterations, warmup=0, setup=None, cold=False):
+    """
+    Time `operation(*setup())` `iterations` times. setup() runs outside the
+    timed section; with cold=True the cache is cleared before each run.
+    """
+    timings = []
+    queries = []
+    for run in range(warmup + iterations):
+        args = setup() if setup else ()
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            operation(*args)
+            elapsed = time.perf_counter() - started
+        if run >= warmup:
+            timings.append(elapsed * 1000)
+            queries.append(len(captured))
+
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "throughput": round(iterations / (sum(timings) / 1000), 1) if sum(timings) else None,
+        "latency_ms": {
+            "mean": round(sum(timings) / len(timings), 2),
+            "p50": round(percentile(timings, 0.50), 2),
+            "p95": round(percentile(timings, 0.95), 2),
+            "p99": round(percentile(timings, 0.99), 2),
+        },
+        "queries": {
+            "mean": round(sum(queries) / len(queries), 1),
+            "max": max(queries),
+        },
+    }
+
+
+class Suite:
+    """
+    The benchmark scenarios, sharing one seeded catalogue.
+    """
+
+    def __init__(self, products, iterations, warmup=0, cold=False):
+        self.products = products
+        self.iterations = iterations
+        self.warmup = warmup
+        self.cold = cold
+        self._cursor = 0
+
+    def _next_product(self):
+        self._cursor = (self._cursor + 1) % len(self.products)
+        return self.products[self._cursor]
+
+    def _basket(self):
+        return {
+            str(product.pk): 1
+            for product in self.products[:BASKET_LINES]
+        }
+
+    def _shopper(self):
+        """
+        A client with BASKET_LINES products in its basket and checkout
+        details in its session.
+        """
+        client = Client()
+        for product in self.products[:BASKET_LINES]:
+            client.post(product.get_absolute_url(), {"quantity": 1})
+        session = client.session
+        session["user_info"] = USER_INFO
+        session.save()
+        return client
+
+    def _get(self, client, url, url_name):
+        def operation():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise AssertionError(f"GET {url} returned {response.status_code}")
+
+        result = measure(operation, self.iterations, self.warmup, cold=self.cold)
+        result["budget"] = settings.QUERY_BUDGETS.get(url_name)
+        return result
+
+    def product_list(self):
+        return self._get(Client(), reverse("products"), "products")
+
+    def product_list_filtered(self):
+        url = reverse("product_candles") + "?scent=lavender&price=20"
+        return self._get(Client(), url, "product_candles")
+
+    def product_search(self):
+        return self._get(Client(), reverse("products") + "?search=lavender", "products")
+
+    def product_detail(self):
+        client = Client()
+
+        def operation(product):
+            response = client.get(product.get_absolute_url())
+            if response.status_code != 200:
+                raise AssertionError(f"{product.slug} returned {response.status_code}")
+
+        result = measure(
+            operation, self.iterations, self.warmup,
+            setup=lambda: (self._next_product(),), cold=self.cold,
+        )
+        result["budget"] = settings.QUERY_BUDGETS.get("product_detail")
+        return result
+
+    def basket_page(self):
+        return self._get(self._shopper(), reverse("basket"), "basket")
+
+    def checkout(self):
+        client = self._shopper()
+        url = reverse("stripe_payment")
+        stub = SimpleNamespace(id="cs_test_benchmark", url="")
+
+        with mock.patch("stripe.checkout.Session.create", return_value=stub):
+            return self._get(client, url, "stripe_payment")
+
+    def create_order_from_basket(self):
+        basket = self._basket()
+
+        def operation(pricing):
+            create_order_from_basket(basket=basket, user_info=USER_INFO, pricing=pricing)
+
+        return measure(
+            operation, self.iterations, self.warmup,
+            setup=lambda: (calculate_basket(basket),),
+        )
+
+    def mark_order_as_paid(self):
+        basket = self._basket()
+
+        def setup():
+            order = create_order_from_basket(
+                basket=basket,
+                user_info=USER_INFO,
+                pricing=calculate_basket(basket),
+            )
+            return (order,)
+
+        return measure(
+            lambda order: mark_order_as_paid(order, "pi_benchmark"),
+            self.iterations, self.warmup, setup=setup,
+        )
+
+
+SCENARIOS = (
+    "product_list",
+    "product_list_filtered",
+    "product_search",
+    "product_detail",
+    "basket_page",
+    "checkout",
+    "create_order_from_basket",
+    "mark_order_as_paid",
+)
+
+
+def run(products, iterations, warmup=0, cold=False, scenarios=SCENARIOS):
+    """
+    Run the given scenarios against an already seeded database and return
+    the report as a dict.
+    """
+    suite = Suite(list(products), iterations, warmup, cold)
+    return {
+        "database": connection.vendor,
+        "products": len(suite.products),
+        "orders": Order.objects.count(),
+        "cache": "cold" if cold else "warm",
+        "scenarios": {name: getattr(suite, name)() for name in scenarios},
+    }
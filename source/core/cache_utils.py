@@ -0,0 +1,64 @@
+"""
+Versioned cache helpers shared across apps.
+
+Each namespace has a version token stored in the cache. Keys built with
+versioned_key() embed that token, so bumping the version invalidates every
+entry in the namespace at once without having to know the individual keys.
+
+Every lookup (and every storefront page-cache lookup, see page_cache)
+sends cache_lookup, so instrumentation such as the monitoring app can
+count hits without this module knowing about it.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.dispatch import Signal
+
+VERSION_KEY = "cache-version:{}"
+
+# Sent with namespace (e.g. "catalogue", "page") and hit (bool).
+cache_lookup = Signal()
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def get_version(namespace):
+    """
+    Return the current version token for a namespace, creating one if the
+    cache has none (first use, restart or eviction). A fresh random token
+    guarantees an evicted version never resurrects stale entries.
+    """
+    key = VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """
+    Invalidate every entry in a namespace.
+    """
+    cache.set(VERSION_KEY.format(namespace), _new_version(), None)
+
+
+def versioned_key(namespace, *parts):
+    return ":".join([namespace, get_version(namespace), *map(str, parts)])
+
+
+def get_or_set(namespace, *parts, loader, timeout=None):
+    """
+    Fetch a value from a versioned namespace, calling loader() on a miss.
+    None results are cached too, so empty lookups stay cheap.
+    """
+    key = versioned_key(namespace, *parts)
+    hit = cache.get(key)
+    cache_lookup.send(sender=None, namespace=namespace, hit=hit is not None)
+    if hit is not None:
+        return hit[0]
+    value = loader()
+    cache.set(key, (value,), timeout)
+    return value
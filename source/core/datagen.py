@@ -0,0 +1,355 @@
+"""
+Synthetic store data for performance work.
+
+`manage.py generate_store_data` (and the benchmarks) use these helpers to
+fill a database with a realistic catalogue, order history and shopper
+sessions:
+
+- products cycle through every product type / scent / colour / size
+  combination, with repeated titles the way real ranges have them;
+- orders carry one to four lines, with shipments for shipped orders and
+  refunded quantities for refunded ones;
+- sessions hold checkout details, and each has a basket in the basket
+  cache, as CacheBasketStorage would leave it. The app links the two only
+  through the shopper's cookies, so generate_sessions() returns the
+  (session key, basket id) pairs and session_cookies() turns a pair into
+  the cookies a client would send.
+
+Everything is inserted with bulk_create in batches, and the same seed
+always produces the same data. Order references, session keys and
+basket ids end in a serial numbered on from the rows already there, so
+running again with the same seed adds rows instead of clashing. Product.save() is never called: slugs come
+from one SlugAllocator (one query per distinct title) and SEO defaults
+are filled in memory.
+"""
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.timezone import now
+
+from basket.storage import CacheBasketStorage, basket_cache_key, encode_basket, signed_cookie
+from branding.models import Branding
+from home.models import HomePage, TermsAndPolicies
+from orders.models import Order, OrderItem, Shipment
+from products.models import Product, ProductSettings
+from products.search import get_search_backend
+from products.slugs import SlugAllocator
+from .cache_utils import bump_version
+
+BATCH_SIZE = 5000
+
+# Orders draw their lines from a sample of the catalogue this size.
+ORDER_PRODUCT_POOL = 10000
+
+HISTORY_DAYS = 730
+
+RANGES = (
+    "Cosy", "Midnight", "Garden", "Cottage", "Seaside", "Velvet",
+    "Winter", "Golden", "Meadow", "Harvest", "Signature", "Little",
+)
+
+SENTENCES = (
+    "Hand-poured in small batches using natural soy wax.",
+    "A slow, even melt that fills the room with fragrance.",
+    "Finished by hand and packed in recyclable materials.",
+    "Pairs beautifully with our matching wax melts.",
+    "Made in the UK with phthalate-free fragrance oils.",
+    "A thoughtful gift for birthdays and housewarmings.",
+)
+
+# (status, weight) for generated orders
+ORDER_STATUSES = (
+    ("paid", 55),
+    ("shipped", 30),
+    ("pending", 5),
+    ("failed", 5),
+    ("refunded", 5),
+)
+
+CARRIERS = ("Royal Mail", "DPD", "Evri", "Parcelforce")
+
+CITIES = (
+    ("London", "E1 6AN"),
+    ("Manchester", "M1 1AE"),
+    ("Leeds", "LS1 4DY"),
+    ("Bristol", "BS1 5TR"),
+    ("York", "YO1 7HH"),
+    ("Glasgow", "G1 1XQ"),
+    ("Cardiff", "CF10 1EP"),
+)
+
+FIRST_NAMES = ("Amelia", "Oliver", "Isla", "George", "Ava", "Noah", "Mia", "Leo", "Grace", "Arthur")
+LAST_NAMES = ("Smith", "Jones", "Taylor", "Brown", "Williams", "Wilson", "Evans", "Walker", "Hughes")
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+@contextmanager
+def _explicit_timestamps(model, *field_names):
+    """
+    Let bulk_create keep the given auto_now/auto_now_add values instead of
+    overwriting them with the current time.
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _person(rng):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    city, postal_code = rng.choice(CITIES)
+    return {
+        "full_name": f"{first} {last}",
+        "email": f"{first}.{last}{rng.randrange(10000)}@example.com".lower(),
+        "address_line1": f"{rng.randint(1, 250)} {rng.choice(LAST_NAMES)} Road",
+        "address_line2": "",
+        "city": city,
+        "postal_code": postal_code,
+        "country": "United Kingdom",
+    }
+
+
+def ensure_store_settings():
+    """
+    Create the single-row configuration models if they are missing.
+    """
+    if not ProductSettings.objects.exists():
+        ProductSettings.objects.create(
+            delivery_fee=Decimal("3.50"),
+            free_delivery_over=Decimal("40.00"),
+        )
+    for model in (Branding, HomePage, TermsAndPolicies):
+        if not model.objects.exists():
+            model.objects.create()
+
+
+def generate_products(count, seed=0, batch_size=BATCH_SIZE, stock=None):
+    """
+    Insert `count` products. `stock` fixes every product's stock level;
+    by default it varies, with some products sold out.
+    Returns the number created.
+    """
+    rng = random.Random(seed)
+    combinations = list(itertools.product(
+        Product.ProductType.choices,
+        Product.Scent.choices,
+        Product.Color.values,
+        Product.Size.values,
+    ))
+    slugs = SlugAllocator(Product)
+    started = now()
+    # One reverse() for the whole run instead of one per product.
+    url_template = settings.SITE_URL + reverse("product_detail", kwargs={"product_slug": "__slug__"})
+
+    def rows():
+        for index in range(count):
+            (product_type, type_label), (scent, scent_label), color, size = (
+                combinations[index % len(combinations)]
+            )
+            title = f"{rng.choice(RANGES)} {scent_label} {type_label}"
+            slug = slugs.allocate(title)
+
+            price = Decimal(rng.randrange(399, 3999)) / 100
+            created_at = started - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+            product = Product(
+                title=title,
+                slug=slug,
+                canonical_url=url_template.replace("__slug__", slug),
+                product_type=product_type,
+                scent=scent,
+                color=color,
+                size=size,
+                description=" ".join(rng.sample(SENTENCES, 3)),
+                price=price,
+                discount_price=(
+                    (price * Decimal(rng.choice(("0.8", "0.85", "0.9")))).quantize(Decimal("0.01"))
+                    if rng.random() < 0.15 else Decimal("0.00")
+                ),
+                stock_quantity=stock if stock is not None else rng.choice((0, 3, 12, 25, 60, 150)),
+                featured=rng.random() < 0.02,
+                best_seller=rng.random() < 0.05,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+            product.apply_seo_defaults()
+            yield product
+
+    created = 0
+    with _explicit_timestamps(Product, "created_at", "updated_at"):
+        for batch in _batches(rows(), batch_size):
+            Product.objects.bulk_create(batch)
+            created += len(batch)
+
+    if created:
+        get_search_backend().rebuild()
+        transaction.on_commit(lambda: bump_version("catalogue"))
+    return created
+
+
+def _product_pool(rng):
+    pks = list(Product.objects.order_by("pk").values_list("pk", flat=True))
+    if len(pks) > ORDER_PRODUCT_POOL:
+        pks = rng.sample(pks, ORDER_PRODUCT_POOL)
+    return list(
+        Product.objects
+        .filter(pk__in=pks)
+        .order_by("pk")
+        .values_list("pk", "title", "price")
+    )
+
+
+def generate_orders(count, seed=0, batch_size=BATCH_SIZE):
+    """
+    Insert `count` orders with their items, and shipments for shipped
+    orders. Returns the number created.
+    """
+    rng = random.Random(seed)
+    pool = _product_pool(rng)
+    if not pool:
+        return 0
+
+    statuses, weights = zip(*ORDER_STATUSES)
+    serial = itertools.count(Order.objects.count())
+    started = now()
+    delivery_fee = Decimal("3.50")
+    created = 0
+
+    for batch_start in range(0, count, batch_size):
+        orders = []
+        lines = []
+        for _ in range(min(batch_size, count - batch_start)):
+            items = [
+                (product, rng.randint(1, 3))
+                for product in rng.sample(pool, min(rng.randint(1, 4), len(pool)))
+            ]
+            subtotal = sum(price * quantity for (_, _, price), quantity in items)
+            status = rng.choices(statuses, weights)[0]
+            orders.append(Order(
+                reference=f"{rng.getrandbits(32):08X}{next(serial):08X}",
+                status=status,
+                subtotal=subtotal,
+                delivery_fee=delivery_fee,
+                total=subtotal + delivery_fee,
+                stripe_payment_intent=(
+                    f"pi_{rng.getrandbits(64):016x}" if status in ("paid", "shipped", "refunded") else None
+                ),
+                created_at=started - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400)),
+                **_person(rng),
+            ))
+            lines.append(items)
+
+        Order.objects.bulk_create(orders)
+
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_id=product_id,
+                product_title=title,
+                unit_price=price,
+                quantity=quantity,
+                refunded_quantity=quantity if order.status == "refunded" else 0,
+            )
+            for order, items in zip(orders, lines)
+            for (product_id, title, price), quantity in items
+        ], batch_size=batch_size)
+
+        Shipment.objects.bulk_create([
+            Shipment(
+                order=order,
+                carrier=rng.choice(CARRIERS),
+                tracking_number=f"{rng.getrandbits(48):012X}",
+                estimated_delivery=(order.created_at + timedelta(days=rng.randint(2, 5))).date(),
+            )
+            for order in orders
+            if order.status == "shipped"
+        ])
+        created += len(orders)
+
+    return created
+
+
+def generate_sessions(count, seed=0, batch_size=BATCH_SIZE):
+    """
+    Insert `count` shopper sessions holding checkout details, each with a
+    basket in the basket cache. Some sessions are already expired, for
+    prune_sessions to remove. Returns [(session_key, basket_id)], one pair
+    per shopper.
+    """
+    rng = random.Random(seed)
+    product_ids = [pk for pk, _, _ in _product_pool(rng)]
+    if not product_ids:
+        return []
+
+    encoder = import_module(settings.SESSION_ENGINE).SessionStore()
+    serial = itertools.count(Session.objects.count())
+    started = now()
+    shoppers = []
+
+    for batch_start in range(0, count, batch_size):
+        sessions = []
+        baskets = {}
+        for _ in range(min(batch_size, count - batch_start)):
+            number = next(serial)
+            basket_id = f"{rng.getrandbits(96):024x}{number:08x}"
+            baskets[basket_cache_key(basket_id)] = encode_basket({
+                product_id: rng.randint(1, 3)
+                for product_id in rng.sample(product_ids, min(rng.randint(1, 6), len(product_ids)))
+            })
+            sessions.append(Session(
+                session_key=f"{rng.getrandbits(128):032x}{number:08x}",
+                session_data=encoder.encode({"user_info": _person(rng)}),
+                expire_date=started + timedelta(days=rng.randint(-7, 14)),
+            ))
+            shoppers.append((sessions[-1].session_key, basket_id))
+
+        Session.objects.bulk_create(sessions)
+        cache.set_many(baskets, timeout=settings.BASKET_COOKIE_AGE)
+
+    return shoppers
+
+
+def session_cookies(session_key, basket_id):
+    """
+    The cookies a shopper from generate_sessions() would send: the session
+    cookie and the signed basket id CacheBasketStorage reads.
+    """
+    name = CacheBasketStorage.cookie_name
+    return {
+        settings.SESSION_COOKIE_NAME: session_key,
+        name: signed_cookie(name, basket_id),
+    }
+
+
+def generate(products=0, orders=0, sessions=0, seed=0, batch_size=BATCH_SIZE, stock=None):
+    """
+    Generate a full data set in one transaction. Returns ({kind: number
+    created}, the (session_key, basket_id) pairs from generate_sessions()).
+    """
+    with transaction.atomic():
+        ensure_store_settings()
+        created = {
+            "products": generate_products(products, seed, batch_size, stock=stock),
+            "orders": generate_orders(orders, seed, batch_size),
+        }
+        shoppers = generate_sessions(sessions, seed, batch_size)
+    created["sessions"] = len(shoppers)
+    return created, shoppers
@@ -5,20 +5,52 @@ from django.core.mail import EmailMessage
 from django.conf import settings
 
 
-def send_company_email(subject, message, recipient_list, html_message=None):
+def build_company_email(subject, message, recipient_list, html_message=None, connection=None, from_email=None):
     email = EmailMessage(
         subject=subject,
         body=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
         to=recipient_list,
+        connection=connection,
     )
 
     if html_message:
         email.content_subtype = "html"
         email.body = html_message
 
-    return email.send()
+    return email
+
+
+def send_company_email(subject, message, recipient_list, html_message=None):
+    """
+    Send immediately, bypassing the outbox.
+    """
+    return build_company_email(subject, message, recipient_list, html_message).send()
+
 
+def send_email_by_context(subject, message, recipient_list, html_message=None, idempotency_key=None):
+    """
+    Queue an email in the outbox; `manage.py process_email_outbox`
+    delivers it. Queueing again with the same idempotency key is a no-op.
+    """
+    from outbox.queue import enqueue
 
-def send_email_by_context(subject, message, recipient_list, html_message=None):
-    return send_company_email(subject, message, recipient_list, html_message)
+    return enqueue(subject, message, recipient_list, html_message, idempotency_key)
+
+
+def send_individual_emails_by_context(subject, message, recipients, html_message=None):
+    """
+    Queue one email per recipient (so addresses are not disclosed to each
+    other) with a single insert.
+    """
+    from outbox.queue import enqueue_many
+
+    return enqueue_many(
+        {
+            "subject": subject,
+            "message": message,
+            "recipient_list": [recipient],
+            "html_message": html_message,
+        }
+        for recipient in recipients
+    )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        "Write sitemap files to SITEMAP_ROOT, re-rendering only the product "
+        "shards that changed since the last run. Run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Re-render every shard, ignoring the manifest.",
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = build_sitemaps(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Sitemaps up to date ({len(rebuilt)} product shard(s) rebuilt)."
+        ))
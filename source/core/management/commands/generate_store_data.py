@@ -0,0 +1,45 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import datagen
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate synthetic products, orders (with items and shipments) "
+        "and shopper sessions with baskets, for performance testing. "
+        "The same --seed always produces the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--orders", type=int, default=0)
+        parser.add_argument("--sessions", type=int, default=0)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=datagen.BATCH_SIZE)
+        parser.add_argument(
+            "--cookies-file",
+            help="Write each generated session's cookies (session and basket) "
+                 "to this file, one JSON object per line, for load tests.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        created, shoppers = datagen.generate(
+            products=options["products"],
+            orders=options["orders"],
+            sessions=options["sessions"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+        if options["cookies_file"]:
+            with open(options["cookies_file"], "w") as f:
+                for session_key, basket_id in shoppers:
+                    f.write(json.dumps(datagen.session_cookies(session_key, basket_id)) + "\n")
+
+        summary = ", ".join(f"{count} {kind}" for kind, count in created.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {summary} in {time.monotonic() - started:.1f}s."
+        ))
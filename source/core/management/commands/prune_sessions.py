@@ -0,0 +1,42 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions in small batches, so django_session is "
+        "never locked for long. Run daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Seconds to sleep between batches.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = now()
+        deleted = 0
+
+        while True:
+            keys = list(
+                Session.objects
+                .filter(expire_date__lt=cutoff)
+                .values_list("session_key", flat=True)[:options["batch_size"]]
+            )
+            if not keys:
+                break
+
+            Session.objects.filter(session_key__in=keys).delete()
+            deleted += len(keys)
+
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired session(s)."))
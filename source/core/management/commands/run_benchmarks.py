@@ -0,0 +1,121 @@
+import json
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the storefront and checkout hot paths against a freshly "
+        "seeded test database and print the results as JSON. The test "
+        "database is built from the project's migrations, so run "
+        "`manage.py makemigrations` first on a fresh checkout."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=500)
+        parser.add_argument("--orders", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=benchmarks.SCENARIOS,
+            help="Run only this scenario (repeatable).",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Clear the cache before every iteration.",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database between runs (it is reseeded).",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+        parser.add_argument(
+            "--check-budgets",
+            action="store_true",
+            help="Exit with an error if a view's max queries exceed QUERY_BUDGETS.",
+        )
+
+    def apps_without_tables(self):
+        """
+        Labels of apps with a model whose table migrate did not create.
+        """
+        tables = set(connection.introspection.table_names())
+        return sorted({
+            model._meta.app_label
+            for model in apps.get_models()
+            if model._meta.managed and model._meta.db_table not in tables
+        })
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict["NAME"]
+        setup_test_environment(debug=False)
+        connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            keepdb=options["keepdb"],
+            serialize=False,
+        )
+        try:
+            missing = self.apps_without_tables()
+            if missing:
+                raise CommandError(
+                    "The test database is missing tables for: "
+                    + ", ".join(missing)
+                    + ". Migrations are not kept in the repository: run "
+                    "`manage.py makemigrations` and try again."
+                )
+
+            # A private cache, so benchmarks never touch the shared one, and
+            # no metric flushes mixed into the measured queries.
+            with override_settings(
+                CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+                MONITORING_ENABLED=False,
+                QUERY_BUDGET_MODE="log",
+            ):
+                if options["keepdb"]:
+                    call_command("flush", interactive=False, verbosity=0)
+                products = benchmarks.seed(
+                    products=options["products"],
+                    orders=options["orders"],
+                    seed=options["seed"],
+                )
+                report = benchmarks.run(
+                    products,
+                    iterations=options["iterations"],
+                    warmup=options["warmup"],
+                    cold=options["cold"],
+                    scenarios=options["scenario"] or benchmarks.SCENARIOS,
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
+
+        if options["check_budgets"]:
+            over = [
+                f"{name}: {result['queries']['max']} queries (budget {result['budget']})"
+                for name, result in report["scenarios"].items()
+                if result.get("budget") is not None and result["queries"]["max"] > result["budget"]
+            ]
+            if over:
+                raise CommandError("Query budgets exceeded: " + "; ".join(over))
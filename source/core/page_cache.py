@@ -0,0 +1,126 @@
+"""
+Per-view page caching for storefront pages.
+
+Replaces the old whole-site UpdateCacheMiddleware/FetchFromCacheMiddleware
+pair. Catalogue and content pages are cached in the shared cache under a
+key prefix built from:
+
+- the versions of the catalogue, page SEO and singleton namespaces, so a
+  Product/PageSEO/settings save invalidates every cached page at once;
+- the basket fragment (the header item count), so shoppers never see
+  another basket's count.
+
+Cached pages may contain forms, so the CSRF token in the HTML is swapped
+for the current visitor's on every response (see refresh_csrf_tokens()).
+
+Basket and checkout views use never_cache instead.
+"""
+import hashlib
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_page
+
+from branding.models import Branding
+from home.models import HomePage, TermsAndPolicies
+from products.models import ProductSettings
+from .cache_utils import VERSION_KEY, cache_lookup, get_version
+
+
+def _content_namespaces():
+    return ["catalogue", "page_seo"] + [
+        model.objects.cache_namespace
+        for model in (Branding, ProductSettings, HomePage, TermsAndPolicies)
+    ]
+
+
+def content_versions(catalogue=True):
+    """
+    Version tokens for everything a storefront page renders, fetched in one
+    cache round trip. Pass catalogue=False when the caller tracks product
+    changes itself (e.g. via updated_at).
+    """
+    namespaces = _content_namespaces()
+    if not catalogue:
+        namespaces.remove("catalogue")
+    found = cache.get_many([VERSION_KEY.format(ns) for ns in namespaces])
+    return [
+        found.get(VERSION_KEY.format(ns)) or get_version(ns)
+        for ns in namespaces
+    ]
+
+
+def basket_fragment(request):
+    """
+    The part of the basket that appears on every page (the header count).
+    """
+    return str(request.basket.item_count)
+
+
+def storefront_key_prefix(request):
+    parts = content_versions() + [basket_fragment(request)]
+    digest = hashlib.md5(":".join(parts).encode()).hexdigest()
+    return f"{settings.CACHE_MIDDLEWARE_KEY_PREFIX}.{digest}"
+
+
+CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def refresh_csrf_tokens(request, response):
+    """
+    Replace the CSRF tokens baked into a (possibly cached) page with one
+    for this request. get_token() also makes CsrfViewMiddleware set the
+    visitor's csrftoken cookie, which a cache hit would otherwise skip.
+    """
+    def refresh(response):
+        if response.streaming or b"csrfmiddlewaretoken" not in response.content:
+            return
+        token = get_token(request).encode()
+        response.content = CSRF_INPUT_RE.sub(
+            lambda match: match.group(1) + token + match.group(2), response.content
+        )
+
+    if getattr(response, "is_rendered", True):
+        refresh(response)
+    else:
+        # Cache miss: runs after cache_page has stored the rendered page.
+        response.add_post_render_callback(refresh)
+    return response
+
+
+def cache_storefront_page(timeout):
+    """
+    Cache a storefront view in the shared cache for `timeout` seconds.
+
+    Browsers and Cloudflare are told to revalidate (max-age=0), because the
+    server-side entry is what gets invalidated on content changes.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if settings.DEBUG:
+                return view_func(request, *args, **kwargs)
+
+            rendered = []
+
+            def render(request, *args, **kwargs):
+                rendered.append(True)
+                return view_func(request, *args, **kwargs)
+
+            cached_view = cache_page(
+                timeout, key_prefix=storefront_key_prefix(request)
+            )(render)
+            response = refresh_csrf_tokens(request, cached_view(request, *args, **kwargs))
+            if request.method in ("GET", "HEAD"):
+                # A GET that never reached the view was served from the cache.
+                cache_lookup.send(sender=None, namespace="page", hit=not rendered)
+            patch_cache_control(response, max_age=0, must_revalidate=True)
+            return response
+
+        return _wrapped_view
+
+    return decorator
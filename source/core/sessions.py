@@ -0,0 +1,37 @@
+"""
+Session engine: cached_db sessions that skip unchanged writes.
+
+Reads come from the shared cache and fall back to django_session. Django
+saves a session whenever it is marked modified, even when a view only
+re-assigned the same value; this store compares the serialised data with
+what was loaded and skips both the UPDATE and the cache write if nothing
+changed.
+
+Enable with SESSION_ENGINE = "core.sessions".
+"""
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+
+class SessionStore(CachedDBStore):
+    def __init__(self, session_key=None):
+        self._loaded_state = None
+        super().__init__(session_key)
+
+    def _state(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        self._loaded_state = self._state(data)
+        return data
+
+    def save(self, must_create=False):
+        if (
+            not must_create
+            and self.session_key
+            and self._loaded_state is not None
+            and self._state(self._get_session()) == self._loaded_state
+        ):
+            return
+        super().save(must_create)
+        self._loaded_state = self._state(self._session)
@@ -0,0 +1,55 @@
+"""
+Process-wide caching for single-row configuration models
+(Branding, ProductSettings, HomePage, TermsAndPolicies).
+"""
+from django.db import models
+
+from .cache_utils import bump_version, get_version
+
+# {namespace: (version, instance)} kept for the lifetime of the worker.
+_instances = {}
+
+
+class SingletonManager(models.Manager):
+    """
+    Manager for configuration models that only ever have one row.
+
+    get_solo() keeps the row in memory per process. Each read compares the
+    in-memory copy against a version token in the shared cache, which
+    post_save/post_delete bump via invalidate_singleton(), so every worker
+    reloads after an edit without polling the database.
+    """
+
+    def __init__(self, prefetch=()):
+        super().__init__()
+        self.prefetch = tuple(prefetch)
+
+    @property
+    def cache_namespace(self):
+        return f"singleton:{self.model._meta.label_lower}"
+
+    def get_solo(self):
+        """
+        Return the configured instance, or None if none exists yet.
+        """
+        namespace = self.cache_namespace
+        version = get_version(namespace)
+
+        cached = _instances.get(namespace)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        instance = self.get_queryset().prefetch_related(*self.prefetch).first()
+        _instances[namespace] = (version, instance)
+        return instance
+
+    def invalidate(self):
+        _instances.pop(self.cache_namespace, None)
+        bump_version(self.cache_namespace)
+
+
+def invalidate_singleton(sender, **kwargs):
+    """
+    Signal receiver: drop the cached row for the saved/deleted model.
+    """
+    sender._default_manager.invalidate()
@@ -1,7 +1,47 @@
+"""
+Sitemaps, pre-rendered to files.
+
+`manage.py build_sitemaps` writes:
+
+- sitemap-static.xml for the fixed pages;
+- sitemap-products-<n>.xml shards, each covering a block of SHARD_SIZE
+  product ids, with image entries;
+- sitemap.xml, the index pointing at every shard with its lastmod;
+- manifest.json, recording a fingerprint per product shard.
+
+Rebuilds are incremental: one aggregate query fingerprints every shard
+(product count, in-stock count, latest updated_at) and only shards whose
+fingerprint changed are re-rendered. The views below serve the files, so
+crawler traffic never scans the product table.
+"""
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.db.models import Count, F, Max, Q
+from django.http import FileResponse, Http404
 from django.urls import reverse
+from django.views.decorators.http import condition
+
+from home.models import TermsAndPolicies
 from products.models import Product
-from django.utils import timezone
+
+SHARD_SIZE = 5000
+
+URLSET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+    'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">\n'
+)
+INDEX_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+
 
 # -----------------------------
 # Static pages sitemap
@@ -10,6 +50,17 @@ class StaticViewSitemap(Sitemap):
     changefreq = 'monthly'
     priority = 0.8
 
+    # Listing pages change when the products they show change.
+    LISTING_FILTERS = {
+        'home': Q(),
+        'products': Q(),
+        'product_new': Q(),
+        'product_candles': Q(product_type='candle'),
+        'product_waxmelts': Q(product_type='waxmelt'),
+        'product_gifts': Q(product_type='gift'),
+        'product_offers': Q(discount_price__gt=0, discount_price__lt=F('price')),
+    }
+
     def items(self):
         # All static pages by URL name
         return [
@@ -34,8 +85,20 @@ class StaticViewSitemap(Sitemap):
             return reverse(item, kwargs={'policy_type': 'privacy-policy'})
         return reverse(item)
 
+    def _lastmods(self):
+        if not hasattr(self, '_lastmod_cache'):
+            lastmods = Product.objects.filter(stock_quantity__gt=0).aggregate(**{
+                name: Max('updated_at', filter=q) for name, q in self.LISTING_FILTERS.items()
+            })
+            policies = TermsAndPolicies.objects.get_solo()
+            lastmods['policy_page'] = policies.updated_at if policies else None
+            self._lastmod_cache = lastmods
+        return self._lastmod_cache
+
     def lastmod(self, item):
-        return timezone.now()
+        # None (e.g. basket, contact) leaves lastmod out rather than
+        # claiming the page changed just now.
+        return self._lastmods().get(item)
 
 
 # -----------------------------
@@ -53,3 +116,184 @@ class ProductSitemap(Sitemap):
 
     def lastmod(self, obj):
         return obj.updated_at
+
+
+# -----------------------------
+# Pre-rendered files
+# -----------------------------
+
+def sitemap_root():
+    return Path(settings.SITEMAP_ROOT)
+
+
+def _write(path, content):
+    # Write then rename, so a crawler never reads a half-written file.
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _url_entry(loc, lastmod=None, changefreq=None, priority=None, images=()):
+    parts = [f"  <url>\n    <loc>{escape(loc)}</loc>\n"]
+    if lastmod:
+        parts.append(f"    <lastmod>{lastmod.date().isoformat()}</lastmod>\n")
+    if changefreq:
+        parts.append(f"    <changefreq>{changefreq}</changefreq>\n")
+    if priority is not None:
+        parts.append(f"    <priority>{priority}</priority>\n")
+    for image in images:
+        parts.append(f"    <image:image><image:loc>{escape(image)}</image:loc></image:image>\n")
+    parts.append("  </url>\n")
+    return "".join(parts)
+
+
+def _render_static():
+    sitemap = StaticViewSitemap()
+    entries = []
+    latest = None
+    for item in sitemap.items():
+        lastmod = sitemap.lastmod(item)
+        if lastmod and (latest is None or lastmod > latest):
+            latest = lastmod
+        entries.append(_url_entry(
+            f"{settings.SITE_URL}{sitemap.location(item)}",
+            lastmod,
+            sitemap.changefreq,
+            sitemap.priority,
+        ))
+    return URLSET_OPEN + "".join(entries) + "</urlset>\n", latest
+
+
+def _render_products(shard):
+    products = (
+        Product.objects
+        .filter(
+            pk__gte=shard * SHARD_SIZE,
+            pk__lt=(shard + 1) * SHARD_SIZE,
+            stock_quantity__gt=0,
+        )
+        .only("pk", "slug", "updated_at", "image", "og_image")
+        .order_by("pk")
+    )
+    entries = []
+    for product in products.iterator(chunk_size=1000):
+        images = [
+            f"{settings.SITE_URL}{image.url}"
+            for image in (product.image, product.og_image)
+            if image
+        ]
+        entries.append(_url_entry(
+            f"{settings.SITE_URL}{product.get_absolute_url()}",
+            product.updated_at,
+            ProductSitemap.changefreq,
+            ProductSitemap.priority,
+            images,
+        ))
+    return URLSET_OPEN + "".join(entries) + "</urlset>\n"
+
+
+def _shard_fingerprints():
+    """
+    {shard: row} with total, in-stock and latest-change figures per shard,
+    from a single grouped query.
+    """
+    rows = (
+        Product.objects
+        .order_by()
+        .annotate(shard=F("pk") / SHARD_SIZE)
+        .values("shard")
+        .annotate(
+            total=Count("pk"),
+            in_stock=Count("pk", filter=Q(stock_quantity__gt=0)),
+            changed=Max("updated_at"),
+            lastmod=Max("updated_at", filter=Q(stock_quantity__gt=0)),
+        )
+    )
+    return {row["shard"]: row for row in rows}
+
+
+def read_manifest():
+    try:
+        return json.loads((sitemap_root() / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def build_sitemaps(full=False):
+    """
+    Bring the sitemap files up to date. Returns the names of the product
+    shards that were (re)written.
+    """
+    root = sitemap_root()
+    root.mkdir(parents=True, exist_ok=True)
+    previous = {} if full else read_manifest().get("shards", {})
+
+    shards = {}
+    rebuilt = []
+    for shard, row in sorted(_shard_fingerprints().items()):
+        if not row["in_stock"]:
+            continue
+        name = f"sitemap-products-{shard}.xml"
+        fingerprint = [row["total"], row["in_stock"], _iso(row["changed"])]
+        if previous.get(name, {}).get("fingerprint") != fingerprint or not (root / name).exists():
+            _write(root / name, _render_products(shard))
+            rebuilt.append(name)
+        shards[name] = {"fingerprint": fingerprint, "lastmod": _iso(row["lastmod"])}
+
+    for name in set(previous) - set(shards):
+        (root / name).unlink(missing_ok=True)
+
+    static, static_lastmod = _render_static()
+    _write(root / "sitemap-static.xml", static)
+
+    index = [("sitemap-static.xml", _iso(static_lastmod))] + [
+        (name, shard["lastmod"]) for name, shard in shards.items()
+    ]
+    _write(root / "sitemap.xml", INDEX_OPEN + "".join(
+        f"  <sitemap>\n    <loc>{escape(settings.SITE_URL + reverse('sitemap-section', args=[name[len('sitemap-'):-len('.xml')]]))}</loc>\n"
+        + (f"    <lastmod>{lastmod[:10]}</lastmod>\n" if lastmod else "")
+        + "  </sitemap>\n"
+        for name, lastmod in index
+    ) + "</sitemapindex>\n")
+
+    _write(root / "manifest.json", json.dumps({"shards": shards}, indent=2))
+    return rebuilt
+
+
+# -----------------------------
+# Views
+# -----------------------------
+
+def _sitemap_path(name):
+    path = sitemap_root() / Path(name).name
+    if not path.exists() and not (sitemap_root() / "sitemap.xml").exists():
+        # First request after a deploy: build once instead of 404ing.
+        build_sitemaps()
+    if not path.exists():
+        raise Http404
+    return path
+
+
+def _file_name(section):
+    return f"sitemap-{section}.xml" if section else "sitemap.xml"
+
+
+def _last_modified(request, section=None):
+    try:
+        return datetime.fromtimestamp(_sitemap_path(_file_name(section)).stat().st_mtime, tz=dt_timezone.utc)
+    except Http404:
+        return None
+
+
+@condition(last_modified_func=_last_modified)
+def sitemap_file(request, section=None):
+    """
+    Serve the index (no section) or one shard, with Last-Modified so
+    crawlers can revalidate with a 304.
+    """
+    path = _sitemap_path(_file_name(section))
+    return FileResponse(path.open("rb"), content_type="application/xml")
@@ -2,14 +2,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
-from django.contrib.sitemaps.views import sitemap
-from .sitemaps import StaticViewSitemap, ProductSitemap
-
-# Sitemap dict
-sitemaps_dict = {
-    'static': StaticViewSitemap,
-    'products': ProductSitemap,
-}
+from .sitemaps import sitemap_file
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -20,8 +13,9 @@ urlpatterns = [
     path('', include('home.urls')),
     path("ckeditor5/", include('django_ckeditor_5.urls')),
 
-    # Sitemap
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps_dict}, name='django-sitemap'),
+    # Sitemap: pre-rendered by `manage.py build_sitemaps` (see core/sitemaps.py)
+    path('sitemap.xml', sitemap_file, name='django-sitemap'),
+    path('sitemap-<str:section>.xml', sitemap_file, name='sitemap-section'),
 ]
 
 # Serve media + static in development
@@ -16,10 +16,10 @@ class Handler400View(TemplateView):
         """
         Returns context data for the 400 error page.
 
-        Includes the first Branding object and all available Service objects.
+        Includes the cached Branding object and all available Service objects.
         """
         context = {
-            "branding": Branding.objects.first(),
+            "branding": Branding.objects.get_solo(),
             "services": Service.objects.all(),
         }
         return context
@@ -38,10 +38,10 @@ class Handler403View(TemplateView):
         """
         Returns context data for the 403 error page.
 
-        Includes the first Branding object and all available Service objects.
+        Includes the cached Branding object and all available Service objects.
         """
         context = {
-            "branding": Branding.objects.first(),
+            "branding": Branding.objects.get_solo(),
             "services": Service.objects.all(),
         }
         return context
@@ -60,10 +60,10 @@ class Error404View(TemplateView):
         """
         Returns context data for the 404 error page.
 
-        Includes the first Branding object and all available Service objects.
+        Includes the cached Branding object and all available Service objects.
         """
         context = {
-            "branding": Branding.objects.first(),
+            "branding": Branding.objects.get_solo(),
             "services": Service.objects.all(),
         }
         return context
@@ -82,10 +82,10 @@ class Handler500View(TemplateView):
         """
         Returns context data for the 500 error page.
 
-        Includes the first Branding object and all available Service objects.
+        Includes the cached Branding object and all available Service objects.
         """
         context = {
-            "branding": Branding.objects.first(),
+            "branding": Branding.objects.get_solo(),
             "services": Service.objects.all(),
         }
         return context
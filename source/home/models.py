@@ -1,12 +1,16 @@
 from django.db import models
 from django_ckeditor_5.fields import CKEditor5Field
 
+from core.singletons import SingletonManager
+
 
 class HomePage(models.Model):
     """
     Singleton model representing homepage-wide content.
     """
 
+    objects = SingletonManager(prefetch=("feature_sections",))
+
     hero_image = models.ImageField(
         upload_to="home_page/",
         help_text="Upload the hero section background image.",
@@ -110,6 +114,8 @@ class HomePageFeatureSection(models.Model):
 
 
 class TermsAndPolicies(models.Model):
+    objects = SingletonManager()
+
     terms_of_service = CKEditor5Field(config_name='default', null=True, blank=True)
     privacy_policy = CKEditor5Field(config_name='default', null=True, blank=True)
     refund_policy = CKEditor5Field(config_name='default', null=True, blank=True)
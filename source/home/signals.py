@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.singletons import invalidate_singleton
+from .models import HomePage, HomePageFeatureSection, TermsAndPolicies
+
+for model in (HomePage, TermsAndPolicies):
+    post_save.connect(invalidate_singleton, sender=model)
+    post_delete.connect(invalidate_singleton, sender=model)
+
+
+@receiver([post_save, post_delete], sender=HomePageFeatureSection)
+def invalidate_home_page(sender, **kwargs):
+    # Feature sections are prefetched onto the cached HomePage.
+    HomePage.objects.invalidate()
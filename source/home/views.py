@@ -1,8 +1,13 @@
+from django.conf import settings
 from django.views.generic import TemplateView
+from django.utils.decorators import method_decorator
 from .models import HomePage, TermsAndPolicies
 from django.http import Http404
 
+from core.page_cache import cache_storefront_page
 
+
+@method_decorator(cache_storefront_page(settings.CATALOGUE_CACHE_SECONDS), name="dispatch")
 class HomePageView(TemplateView):
     """
     Renders the home page with featured and best-selling products,
@@ -15,13 +20,14 @@ class HomePageView(TemplateView):
 
         context.update(
             {
-                "home": HomePage.objects.first(),
+                "home": HomePage.objects.get_solo(),
             }
         )
 
         return context
 
 
+@method_decorator(cache_storefront_page(settings.POLICY_CACHE_SECONDS), name="dispatch")
 class PolicyPageView(TemplateView):
     """
     Renders any policy page based on policy_type in the URL.
@@ -41,7 +47,7 @@ class PolicyPageView(TemplateView):
         if policy_type not in self.POLICY_FIELDS:
             raise Http404("Policy not found")
 
-        policies = TermsAndPolicies.objects.first()
+        policies = TermsAndPolicies.objects.get_solo()
         if not policies:
             raise Http404("Policies not configured")
 
@@ -0,0 +1,50 @@
+from django.contrib import admin, messages
+from django.utils.html import format_html
+
+from .models import ImageRendition, RenditionJob, SourceImage
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SourceImage)
+class SourceImageAdmin(ReadOnlyAdmin):
+    list_display = ("name", "content_hash", "width", "height")
+    search_fields = ("name", "content_hash")
+
+
+@admin.register(ImageRendition)
+class ImageRenditionAdmin(ReadOnlyAdmin):
+    list_display = ("content_hash", "spec", "format", "width", "height", "preview", "created_at")
+    list_filter = ("spec", "format")
+    search_fields = ("content_hash",)
+
+    def preview(self, obj):
+        return format_html('<img src="{}" style="height:50px;"/>', obj.file.url)
+    preview.short_description = "Preview"
+
+
+@admin.register(RenditionJob)
+class RenditionJobAdmin(ReadOnlyAdmin):
+    list_display = ("source", "status", "attempts", "created_at", "updated_at")
+    list_filter = ("status",)
+    search_fields = ("source",)
+    actions = ("retry",)
+
+    @admin.action(description="Retry selected jobs")
+    def retry(self, request, queryset):
+        updated = queryset.exclude(status=RenditionJob.RUNNING).update(
+            status=RenditionJob.PENDING,
+            attempts=0,
+            last_error="",
+        )
+        self.message_user(
+            request,
+            f"{updated} job(s) queued.",
+            messages.SUCCESS,
+        )
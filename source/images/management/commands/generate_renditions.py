@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from images.models import SourceImage
+from images.renditions import enqueue_renditions, source_changed
+from images.signals import RENDITION_FIELDS
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue every stored image that has not been rendered or queued yet. "
+        "Run process_rendition_jobs to render them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Requeue every image, rendered or failed (e.g. after adding a spec).",
+        )
+        parser.add_argument(
+            "--changed",
+            action="store_true",
+            help="Also requeue rendered images whose file content has changed "
+                 "(reads every rendered file).",
+        )
+
+    def handle(self, *args, **options):
+        sources = set()
+        for model, fields in RENDITION_FIELDS.items():
+            for values in model._default_manager.values_list(*fields):
+                sources.update(name for name in values if name)
+
+        if options["all"]:
+            requeue = sources
+        else:
+            rendered = set(SourceImage.objects.values_list("name", flat=True))
+            requeue = set()
+            if options["changed"]:
+                requeue = {source for source in sources & rendered if source_changed(source)}
+            sources = (sources - rendered) | requeue
+
+        for source in sorted(sources):
+            enqueue_renditions(source, requeue=source in requeue)
+
+        self.stdout.write(self.style.SUCCESS(f"Queued {len(sources)} image(s)."))
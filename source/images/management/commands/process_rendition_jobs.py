@@ -0,0 +1,87 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.cache_utils import bump_version
+from images.models import RenditionJob
+from images.renditions import CACHE_NAMESPACE, claim_jobs, requeue_stale_jobs, run_job
+
+
+def _init_worker():
+    # Under the "spawn"/"forkserver" start methods the child starts empty.
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        "Render queued images across a pool of worker processes. "
+        "Runs until interrupted unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes (default: one per CPU).",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process everything queued, then exit (for cron).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        batch_size = options["batch_size"] or workers * 4
+        done = failed = 0
+
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s).")
+
+        # Children must open their own connections, never share the parent's.
+        connections.close_all()
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                while True:
+                    jobs = claim_jobs(batch_size)
+                    connections.close_all()
+
+                    if not jobs:
+                        if options["once"]:
+                            break
+                        time.sleep(options["interval"])
+                        continue
+
+                    for source, status, detail in pool.map(run_job, jobs):
+                        if status == RenditionJob.DONE:
+                            done += 1
+                        else:
+                            failed += 1
+                        self.stdout.write(f"{source}: {status} ({detail})")
+
+                    # Workers bump it too; repeat here in case the cache
+                    # backend is per-process.
+                    bump_version(CACHE_NAMESPACE)
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendition jobs: {done} done, {failed} failed or retrying."
+        ))
@@ -0,0 +1,87 @@
+from django.db import models
+
+from .specs import SPECS
+
+
+class SourceImage(models.Model):
+    """
+    An uploaded original, identified by the SHA-256 of its content.
+    Several stored files with identical bytes share one set of renditions.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    content_hash = models.CharField(max_length=64, db_index=True)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+
+    def __str__(self):
+        return self.name
+
+
+class ImageRendition(models.Model):
+    """
+    A resized, re-encoded copy of an image, keyed by the content hash of
+    its original.
+    """
+
+    content_hash = models.CharField(max_length=64)
+    spec = models.CharField(
+        max_length=20,
+        choices=[(name, name.title()) for name in SPECS],
+    )
+    format = models.CharField(max_length=10)
+
+    file = models.FileField(upload_to="renditions/", max_length=255)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_hash", "spec", "format"],
+                name="unique_image_rendition",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} [{self.spec}, {self.format}]"
+
+
+class RenditionJob(models.Model):
+    """
+    A stored image waiting for `manage.py process_rendition_jobs`.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    source = models.CharField(max_length=255, unique=True)
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.source} ({self.status})"
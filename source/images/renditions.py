@@ -0,0 +1,261 @@
+# images/renditions.py
+"""
+Queue, generate and look up image renditions.
+
+Saving a model only queues a RenditionJob for the stored file; the
+process_rendition_jobs worker does the decoding and encoding. Outputs are
+keyed by the SHA-256 of the original's bytes, so an image that is already
+rendered (the shared default images, re-uploads of the same photo) costs
+one hash and no encoding.
+
+Lookups go through the versioned "images" cache namespace. Until an
+image's renditions exist, lookups return nothing and templates fall back
+to the original.
+"""
+import hashlib
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.timezone import now
+from PIL import Image, ImageOps
+
+from core.cache_utils import bump_version, get_or_set
+from .models import ImageRendition, RenditionJob, SourceImage
+from .specs import QUALITY, SPECS, output_formats
+
+CACHE_NAMESPACE = "images"
+MAX_ATTEMPTS = 3
+# Jobs left running this long were orphaned by a crashed worker.
+STALE_AFTER = timedelta(minutes=10)
+
+
+def _source_name(image):
+    """
+    Accept a FieldFile or a storage name.
+    """
+    return getattr(image, "name", image) or ""
+
+
+# -------------------------
+# ENCODING
+# -------------------------
+
+def _prepare(image):
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        return image.convert("RGBA")
+    return image.convert("RGB")
+
+
+def _resize(image, spec):
+    if spec.height:
+        return ImageOps.fit(image, (spec.width, spec.height), Image.Resampling.LANCZOS)
+    if image.width <= spec.width:
+        # Never upscale; re-encoding alone still shrinks the file.
+        return image
+    height = round(image.height * spec.width / image.width)
+    return image.resize((spec.width, height), Image.Resampling.LANCZOS)
+
+
+def _encode(image, fmt):
+    buffer = BytesIO()
+    image.save(buffer, fmt.upper(), quality=QUALITY[fmt])
+    return buffer.getvalue()
+
+
+def render_source(source, storage=default_storage):
+    """
+    Make sure every rendition of the stored file `source` exists and
+    record the file's content hash. Only missing spec/format pairs are
+    encoded. Returns the number of renditions created.
+    """
+    with storage.open(source) as fh:
+        data = fh.read()
+    content_hash = hashlib.sha256(data).hexdigest()
+
+    original = Image.open(BytesIO(data))
+    width, height = ImageOps.exif_transpose(original).size
+
+    existing = set(
+        ImageRendition.objects
+        .filter(content_hash=content_hash)
+        .values_list("spec", "format")
+    )
+    formats = output_formats()
+    created = 0
+
+    if len(existing) < len(SPECS) * len(formats):
+        original.load()
+        original = _prepare(original)
+
+        for spec in SPECS.values():
+            missing = [fmt for fmt in formats if (spec.name, fmt) not in existing]
+            if not missing:
+                continue
+            resized = _resize(original, spec)
+            for fmt in missing:
+                rendition = ImageRendition(content_hash=content_hash, spec=spec.name, format=fmt)
+                rendition.file.save(
+                    f"{content_hash[:2]}/{content_hash}-{spec.name}.{fmt}",
+                    ContentFile(_encode(resized, fmt)),
+                    save=False,
+                )
+                rendition.width, rendition.height = resized.size
+                try:
+                    with transaction.atomic():
+                        rendition.save()
+                except IntegrityError:
+                    # Another worker rendered the same content first.
+                    rendition.file.delete(save=False)
+                else:
+                    created += 1
+
+    SourceImage.objects.update_or_create(
+        name=source,
+        defaults={"content_hash": content_hash, "width": width, "height": height},
+    )
+    bump_version(CACHE_NAMESPACE)
+    return created
+
+
+# -------------------------
+# QUEUE
+# -------------------------
+
+def enqueue_renditions(image, requeue=False):
+    """
+    Queue a stored image for rendering. Returns the job, or None for an
+    empty field.
+
+    An existing job is left alone, so failed jobs stay failed and running
+    ones are never claimed twice; `requeue` sends a finished or failed
+    job back to the queue with its attempts reset.
+    """
+    source = _source_name(image)
+    if not source:
+        return None
+    job, created = RenditionJob.objects.get_or_create(source=source)
+    if requeue and not created:
+        RenditionJob.objects.filter(pk=job.pk).exclude(status=RenditionJob.RUNNING).update(
+            status=RenditionJob.PENDING,
+            attempts=0,
+            last_error="",
+            updated_at=now(),
+        )
+    return job
+
+
+def ensure_renditions(image):
+    """
+    Queue `image` unless it has already been rendered or queued. Cheap
+    enough to call from every save: reads only, once a job exists.
+    """
+    source = _source_name(image)
+    if source and not SourceImage.objects.filter(name=source).exists():
+        enqueue_renditions(source)
+
+
+def source_changed(source, storage=default_storage):
+    """
+    True if the stored file no longer matches the content hash recorded
+    when it was rendered. Reads the whole file.
+    """
+    recorded = SourceImage.objects.filter(name=source).values_list("content_hash", flat=True).first()
+    if recorded is None or not storage.exists(source):
+        return False
+    with storage.open(source) as fh:
+        return hashlib.sha256(fh.read()).hexdigest() != recorded
+
+
+def requeue_stale_jobs():
+    return RenditionJob.objects.filter(
+        status=RenditionJob.RUNNING,
+        updated_at__lt=now() - STALE_AFTER,
+    ).update(status=RenditionJob.PENDING, updated_at=now())
+
+
+def claim_jobs(limit):
+    """
+    Mark up to `limit` pending jobs as running and return [(pk, source)].
+    """
+    with transaction.atomic():
+        jobs = list(
+            RenditionJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=RenditionJob.PENDING)
+            .order_by("created_at")
+            .values_list("pk", "source")[:limit]
+        )
+        RenditionJob.objects.filter(pk__in=[pk for pk, _ in jobs]).update(
+            status=RenditionJob.RUNNING,
+            attempts=F("attempts") + 1,
+            updated_at=now(),
+        )
+    return jobs
+
+
+def run_job(job):
+    """
+    Render one claimed job and record the outcome. Runs in a worker
+    process. Returns (source, status, detail).
+    """
+    pk, source = job
+    try:
+        created = render_source(source)
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        attempts = RenditionJob.objects.filter(pk=pk).values_list("attempts", flat=True).first() or 0
+        status = RenditionJob.FAILED if attempts >= MAX_ATTEMPTS else RenditionJob.PENDING
+        RenditionJob.objects.filter(pk=pk).update(status=status, last_error=error, updated_at=now())
+        return source, status, error
+
+    RenditionJob.objects.filter(pk=pk, status=RenditionJob.RUNNING).update(
+        status=RenditionJob.DONE,
+        last_error="",
+        updated_at=now(),
+    )
+    return source, RenditionJob.DONE, f"{created} rendition(s) created"
+
+
+# -------------------------
+# LOOKUP
+# -------------------------
+
+def _load(source):
+    image = SourceImage.objects.filter(name=source).first()
+    if image is None:
+        return {}
+
+    renditions = {"_source": {"width": image.width, "height": image.height}}
+    for rendition in ImageRendition.objects.filter(content_hash=image.content_hash):
+        renditions.setdefault(rendition.spec, {})[rendition.format] = {
+            "url": rendition.file.url,
+            "width": rendition.width,
+            "height": rendition.height,
+        }
+    return renditions
+
+
+def get_renditions(image):
+    """
+    Return {spec: {format: {"url", "width", "height"}}} for `image`, plus
+    the original's dimensions under "_source". Empty until rendered.
+    """
+    source = _source_name(image)
+    if not source:
+        return {}
+    return get_or_set(CACHE_NAMESPACE, source, loader=lambda: _load(source))
+
+
+def rendition_url(image, spec, fmt="webp"):
+    """
+    URL of one rendition, falling back to the original until it exists.
+    """
+    rendition = get_renditions(image).get(spec, {}).get(fmt)
+    if rendition:
+        return rendition["url"]
+    return image.url if image else None
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save
+
+from branding.models import Branding
+from home.models import HomePage, HomePageFeatureSection
+from products.models import Product
+from .renditions import ensure_renditions
+
+# Image fields that get renditions, per model.
+RENDITION_FIELDS = {
+    Product: ("image", "og_image"),
+    Branding: ("hero_image",),
+    HomePage: ("hero_image",),
+    HomePageFeatureSection: ("image",),
+}
+
+
+def create_renditions(sender, instance, update_fields=None, **kwargs):
+    for field in RENDITION_FIELDS[sender]:
+        if update_fields is not None and field not in update_fields:
+            continue
+        image = getattr(instance, field)
+        if image:
+            ensure_renditions(image)
+
+
+for model in RENDITION_FIELDS:
+    post_save.connect(create_renditions, sender=model)
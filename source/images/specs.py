@@ -0,0 +1,46 @@
+"""
+The fixed set of renditions generated for every uploaded image.
+"""
+from typing import NamedTuple, Optional
+
+from PIL import features
+
+
+class RenditionSpec(NamedTuple):
+    name: str
+    width: int
+    # With a height the image is cropped to fill the box; without one it
+    # is scaled to `width`, keeping its aspect ratio.
+    height: Optional[int] = None
+
+
+SPECS = {
+    spec.name: spec
+    for spec in (
+        RenditionSpec("thumbnail", 320),
+        RenditionSpec("card", 640),
+        RenditionSpec("detail", 1280),
+        RenditionSpec("og", 1200, 630),
+    )
+}
+
+# Specs that keep the original aspect ratio, offered together in srcset.
+SRCSET_SPECS = ("thumbnail", "card", "detail")
+
+QUALITY = {
+    "avif": 55,
+    "webp": 80,
+}
+
+MIME_TYPES = {
+    "avif": "image/avif",
+    "webp": "image/webp",
+}
+
+
+def output_formats():
+    """
+    Formats to encode, best compression first. AVIF needs a Pillow built
+    with libavif.
+    """
+    return (["avif"] if features.check("avif") else []) + ["webp"]
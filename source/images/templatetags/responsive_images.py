@@ -0,0 +1,64 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from images.renditions import get_renditions
+from images.specs import MIME_TYPES, SRCSET_SPECS, output_formats
+
+register = template.Library()
+
+
+def _srcset(renditions, fmt):
+    candidates = {}
+    for spec in SRCSET_SPECS:
+        rendition = renditions.get(spec, {}).get(fmt)
+        if rendition:
+            # Small originals are not upscaled, so specs can share a width.
+            candidates.setdefault(rendition["width"], rendition["url"])
+    return ", ".join(f"{url} {width}w" for width, url in sorted(candidates.items()))
+
+
+@register.simple_tag
+def responsive_image(image, sizes="100vw", **attrs):
+    """
+    Render `image` (an ImageField value) as a <picture> offering its AVIF
+    and WebP renditions in srcset, with width/height set so the browser
+    can reserve space before it loads. Extra keyword arguments become
+    attributes of the <img> (alt, class, style, loading, ...).
+
+    Until renditions exist the original is rendered as a plain <img>.
+
+        {% responsive_image product.image sizes="(min-width: 992px) 25vw, 100vw" alt=product.title class="card-img-top" %}
+    """
+    if not image:
+        return ""
+
+    renditions = get_renditions(image)
+    source = renditions.get("_source")
+
+    attrs.setdefault("alt", "")
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+    if source:
+        attrs.setdefault("width", source["width"])
+        attrs.setdefault("height", source["height"])
+
+    img = format_html(
+        '<img src="{}"{}>',
+        image.url,
+        format_html_join("", ' {}="{}"', ((name.replace("_", "-"), value) for name, value in attrs.items())),
+    )
+
+    sources = []
+    for fmt in output_formats():
+        srcset = _srcset(renditions, fmt)
+        if srcset:
+            sources.append((MIME_TYPES[fmt], srcset, sizes))
+
+    if not sources:
+        return img
+
+    return format_html(
+        "<picture>{}{}</picture>",
+        format_html_join("", '<source type="{}" srcset="{}" sizes="{}">', sources),
+        img,
+    )
@@ -0,0 +1,60 @@
+from django.contrib import admin
+
+from .metrics import LATENCY_BUCKETS_MS, QUERY_BUCKETS
+from .models import ViewMetric
+
+
+def _histogram(counts, bounds, unit=""):
+    labels = [f"≤{bound}{unit}" for bound in bounds] + [f">{bounds[-1]}{unit}"]
+    return ", ".join(f"{label}: {count}" for label, count in zip(labels, counts) if count)
+
+
+@admin.register(ViewMetric)
+class ViewMetricAdmin(admin.ModelAdmin):
+    list_display = (
+        "view_name",
+        "period",
+        "requests",
+        "avg_ms",
+        "p50_ms",
+        "p95_ms",
+        "avg_db_ms",
+        "avg_template_ms",
+        "avg_queries",
+        "p95_queries",
+        "max_queries",
+        "cache_hit_rate",
+    )
+
+    list_filter = ("view_name", "period")
+    search_fields = ("view_name",)
+    date_hierarchy = "period"
+
+    fields = (
+        "view_name",
+        "period",
+        "requests",
+        "avg_ms",
+        "avg_db_ms",
+        "avg_template_ms",
+        "latency",
+        "avg_queries",
+        "max_queries",
+        "queries_per_request",
+        "cache_hit_rate",
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Latency histogram")
+    def latency(self, obj):
+        return _histogram(obj.latency_histogram, LATENCY_BUCKETS_MS, "ms")
+
+    @admin.display(description="Queries histogram")
+    def queries_per_request(self, obj):
+        return _histogram(obj.query_histogram, QUERY_BUCKETS)
@@ -0,0 +1,159 @@
+"""
+Per-request instrumentation.
+
+RequestMetrics collects query count, DB time, template render time and
+cache hits for the request being handled. It lives in a context variable,
+so code anywhere in the stack can record into it without having the
+request at hand, and concurrent requests never mix. Cache hits arrive
+through core.cache_utils.cache_lookup (see signals.py).
+
+Finished requests are folded into an in-process buffer keyed by URL name,
+which flush() writes to ViewMetric rows at most every
+MONITORING_FLUSH_SECONDS, so recording costs no queries per request.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+
+# Upper bounds of each histogram bucket; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+    def server_timing(self, total):
+        return ", ".join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f"tpl;dur={self.template_time * 1000:.1f}",
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f"total;dur={total * 1000:.1f}",
+        ])
+
+
+def start():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def record_cache(sender, hit, **kwargs):
+    """
+    cache_lookup receiver.
+    """
+    metrics = _current.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def bucket(value, bounds):
+    return bisect_left(bounds, value)
+
+
+class _Aggregate:
+    def __init__(self):
+        self.requests = 0
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.query_histogram = [0] * (len(QUERY_BUCKETS) + 1)
+
+    def add(self, metrics, total):
+        total_ms = total * 1000
+        self.requests += 1
+        self.total_ms += total_ms
+        self.db_ms += metrics.db_time * 1000
+        self.template_ms += metrics.template_time * 1000
+        self.queries += metrics.queries
+        self.max_queries = max(self.max_queries, metrics.queries)
+        self.cache_hits += metrics.cache_hits
+        self.cache_misses += metrics.cache_misses
+        self.latency_histogram[bucket(total_ms, LATENCY_BUCKETS_MS)] += 1
+        self.query_histogram[bucket(metrics.queries, QUERY_BUCKETS)] += 1
+
+
+_buffer = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record(view_name, metrics, total):
+    with _lock:
+        _buffer.setdefault(view_name, _Aggregate()).add(metrics, total)
+
+
+def flush_due():
+    return time.monotonic() - _last_flush >= settings.MONITORING_FLUSH_SECONDS
+
+
+def flush():
+    """
+    Merge the buffered aggregates into this hour's ViewMetric rows.
+    """
+    global _buffer, _last_flush
+    from .models import ViewMetric
+
+    with _lock:
+        pending, _buffer = _buffer, {}
+        _last_flush = time.monotonic()
+    if not pending:
+        return 0
+
+    period = now().replace(minute=0, second=0, microsecond=0)
+    with transaction.atomic():
+        # Rows other workers are creating concurrently are left to them.
+        ViewMetric.objects.bulk_create(
+            [ViewMetric(view_name=view_name, period=period) for view_name in pending],
+            ignore_conflicts=True,
+        )
+        metrics = list(
+            ViewMetric.objects
+            .select_for_update()
+            .filter(period=period, view_name__in=list(pending))
+        )
+        for metric in metrics:
+            metric.merge(pending[metric.view_name])
+        ViewMetric.objects.bulk_update(metrics, ViewMetric.AGGREGATE_FIELDS)
+    return len(pending)
@@ -0,0 +1,84 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised in QUERY_BUDGET_MODE="raise" when a view runs more queries than
+    its QUERY_BUDGETS entry allows.
+    """
+
+
+def check_query_budget(view_name, queries):
+    budget = settings.QUERY_BUDGETS.get(view_name)
+    if budget is None or queries <= budget:
+        return
+    message = f"{view_name} ran {queries} queries (budget {budget})"
+    if settings.QUERY_BUDGET_MODE == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure every request: query count and DB time (via
+    connection.execute_wrapper), template render time and cache hits.
+
+    Figures are aggregated per URL name into ViewMetric (see
+    monitoring.metrics), checked against QUERY_BUDGETS, and sent back as a
+    Server-Timing header to staff, or to everyone when
+    MONITORING_SERVER_TIMING is on.
+
+    Keep this first in MIDDLEWARE so the session and basket queries count.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.MONITORING_ENABLED:
+            return self.get_response(request)
+
+        request_metrics, token = metrics.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(request_metrics))
+                response = self.get_response(request)
+        finally:
+            metrics.stop(token)
+
+        total = request_metrics.elapsed
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match else "<unresolved>"
+
+        metrics.record(view_name, request_metrics, total)
+        if metrics.flush_due():
+            metrics.flush()
+
+        user = getattr(request, "user", None)
+        if settings.MONITORING_SERVER_TIMING or (user is not None and user.is_staff):
+            response["Server-Timing"] = request_metrics.server_timing(total)
+
+        check_query_budget(view_name, request_metrics.queries)
+        return response
+
+    def process_template_response(self, request, response):
+        # Runs right before the response is rendered; the callback right after.
+        request_metrics = metrics.current()
+        if request_metrics is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                request_metrics.template_time += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
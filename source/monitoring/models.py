@@ -0,0 +1,127 @@
+from django.db import models
+
+from .metrics import LATENCY_BUCKETS_MS, QUERY_BUCKETS
+
+
+def _empty_latency_histogram():
+    return [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+
+def _empty_query_histogram():
+    return [0] * (len(QUERY_BUCKETS) + 1)
+
+
+def _percentile(histogram, bounds, fraction):
+    """
+    Upper bound of the bucket holding the given fraction of requests
+    (None for the open-ended last bucket).
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+    target = total * fraction
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= target:
+            return bounds[index] if index < len(bounds) else None
+    return None
+
+
+class ViewMetric(models.Model):
+    """
+    Request statistics for one URL name over one hour, written by
+    monitoring.metrics.flush().
+    """
+
+    AGGREGATE_FIELDS = [
+        "requests",
+        "total_ms",
+        "db_ms",
+        "template_ms",
+        "queries",
+        "max_queries",
+        "cache_hits",
+        "cache_misses",
+        "latency_histogram",
+        "query_histogram",
+    ]
+
+    view_name = models.CharField(max_length=200)
+    period = models.DateTimeField(help_text="Start of the hour these figures cover.")
+
+    requests = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    db_ms = models.FloatField(default=0)
+    template_ms = models.FloatField(default=0)
+    queries = models.PositiveBigIntegerField(default=0)
+    max_queries = models.PositiveIntegerField(default=0)
+    cache_hits = models.PositiveIntegerField(default=0)
+    cache_misses = models.PositiveIntegerField(default=0)
+
+    # Request counts per bucket of LATENCY_BUCKETS_MS / QUERY_BUCKETS.
+    latency_histogram = models.JSONField(default=_empty_latency_histogram)
+    query_histogram = models.JSONField(default=_empty_query_histogram)
+
+    class Meta:
+        ordering = ["-period", "view_name"]
+        constraints = [
+            models.UniqueConstraint(fields=["view_name", "period"], name="unique_view_metric_period"),
+        ]
+        verbose_name = "View metric"
+        verbose_name_plural = "View metrics"
+
+    def __str__(self):
+        return f"{self.view_name} @ {self.period:%Y-%m-%d %H:00}"
+
+    def merge(self, aggregate):
+        self.requests += aggregate.requests
+        self.total_ms += aggregate.total_ms
+        self.db_ms += aggregate.db_ms
+        self.template_ms += aggregate.template_ms
+        self.queries += aggregate.queries
+        self.max_queries = max(self.max_queries, aggregate.max_queries)
+        self.cache_hits += aggregate.cache_hits
+        self.cache_misses += aggregate.cache_misses
+        self.latency_histogram = [
+            a + b for a, b in zip(self.latency_histogram, aggregate.latency_histogram)
+        ]
+        self.query_histogram = [
+            a + b for a, b in zip(self.query_histogram, aggregate.query_histogram)
+        ]
+
+    def _average(self, total):
+        return round(total / self.requests, 1) if self.requests else None
+
+    @property
+    def avg_ms(self):
+        return self._average(self.total_ms)
+
+    @property
+    def avg_db_ms(self):
+        return self._average(self.db_ms)
+
+    @property
+    def avg_template_ms(self):
+        return self._average(self.template_ms)
+
+    @property
+    def avg_queries(self):
+        return self._average(self.queries)
+
+    @property
+    def p50_ms(self):
+        return _percentile(self.latency_histogram, LATENCY_BUCKETS_MS, 0.50)
+
+    @property
+    def p95_ms(self):
+        return _percentile(self.latency_histogram, LATENCY_BUCKETS_MS, 0.95)
+
+    @property
+    def p95_queries(self):
+        return _percentile(self.query_histogram, QUERY_BUCKETS, 0.95)
+
+    @property
+    def cache_hit_rate(self):
+        lookups = self.cache_hits + self.cache_misses
+        return f"{self.cache_hits / lookups:.0%}" if lookups else None
@@ -0,0 +1,4 @@
+from core.cache_utils import cache_lookup
+from .metrics import record_cache
+
+cache_lookup.connect(record_cache, dispatch_uid="monitoring.record_cache")
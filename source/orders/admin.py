@@ -5,8 +5,10 @@ from django.urls import path
 from django.shortcuts import redirect
 from django.utils.html import format_html
 
-from .models import Order, OrderItem, Shipment
+from .models import Order, OrderItem, Shipment, StockReservation, StripeEvent
 from .emails import send_order_emails, send_shipping_email
+from .services import refund_order_items
+from .stripe_events import replay_events
 
 
 # --------------------------------------------------
@@ -30,6 +32,23 @@ class OrderItemInline(admin.TabularInline):
         return False
 
 
+class StockReservationInline(admin.TabularInline):
+    model = StockReservation
+    extra = 0
+    can_delete = False
+
+    readonly_fields = (
+        "product",
+        "quantity",
+        "status",
+        "expires_at",
+        "created_at",
+    )
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 class ShipmentInline(admin.StackedInline):
     model = Shipment
     extra = 0
@@ -83,7 +102,7 @@ class OrderAdmin(admin.ModelAdmin):
     search_fields = ("reference", "email", "full_name")
     ordering = ("-created_at",)
 
-    inlines = [OrderItemInline, ShipmentInline]
+    inlines = [OrderItemInline, StockReservationInline, ShipmentInline]
 
     # -----------------------------
     # FIELD LOCKDOWN
@@ -362,7 +381,7 @@ class OrderAdmin(admin.ModelAdmin):
                 messages.WARNING,
             )
 
-    @admin.action(description="Mark as refunded (no emails sent)")
+    @admin.action(description="Mark as refunded and restock (no emails sent)")
     def mark_as_refunded(self, request, queryset):
         updated = 0
 
@@ -370,6 +389,9 @@ class OrderAdmin(admin.ModelAdmin):
             if order.status == "refunded":
                 continue
 
+            if order.status in ("paid", "shipped"):
+                refund_order_items(order)
+
             order.status = "refunded"
             order.refunded_at = now()
             order.save(update_fields=["status", "refunded_at", "updated_at"])
@@ -380,3 +402,54 @@ class OrderAdmin(admin.ModelAdmin):
             f"{updated} order(s) marked as refunded.",
             messages.SUCCESS,
         )
+
+
+# --------------------------------------------------
+# STRIPE EVENT LEDGER
+# --------------------------------------------------
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "event_id",
+        "type",
+        "order_id",
+        "status",
+        "attempts",
+        "received_at",
+        "processed_at",
+    )
+
+    list_filter = ("status", "type", "received_at")
+    search_fields = ("event_id", "order_id")
+    ordering = ("-received_at",)
+
+    readonly_fields = (
+        "event_id",
+        "type",
+        "order_id",
+        "payload",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "last_error",
+        "received_at",
+        "processed_at",
+    )
+
+    actions = ("replay",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False  # audit trail
+
+    @admin.action(description="Replay selected events")
+    def replay(self, request, queryset):
+        queued = replay_events(queryset)
+        self.message_user(
+            request,
+            f"{queued} event(s) queued for replay.",
+            messages.SUCCESS,
+        )
@@ -13,10 +13,16 @@ from core import settings
 # ----------------------------------
 
 def send_order_emails(order, *, force=False):
+    """
+    Queue the customer confirmation and the staff notification.
+
+    Unless forced (an explicit resend from the admin), each message has an
+    idempotency key, so a retried webhook never queues a duplicate.
+    """
     if order.emails_sent_at and not force:
         return
 
-    branding = Branding.objects.first()
+    branding = Branding.objects.get_solo()
     if not branding:
         raise RuntimeError("Branding configuration is missing")
 
@@ -37,6 +43,7 @@ def send_order_emails(order, *, force=False):
         message="Thank you for your order.",
         recipient_list=[order.email],
         html_message=customer_html,
+        idempotency_key=None if force else f"order-confirmation:{order.pk}:customer",
     )
 
     # Admin notification
@@ -56,6 +63,7 @@ def send_order_emails(order, *, force=False):
             message="New order received.",
             recipient_list=[u.email for u in admins],
             html_message=admin_html,
+            idempotency_key=None if force else f"order-confirmation:{order.pk}:staff",
         )
 
     order.emails_sent_at = now()
@@ -72,7 +80,7 @@ def send_shipping_email(order):
             f"Cannot send shipping email: Order {order.reference} has no shipment"
         )
     
-    branding = Branding.objects.first()
+    branding = Branding.objects.get_solo()
     if not branding:
         raise RuntimeError("Branding configuration is missing")
 
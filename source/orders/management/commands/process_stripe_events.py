@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.stripe_events import process_pending_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply recorded Stripe webhook events. "
+        "Runs until interrupted unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Apply everything that is due, then exit (for cron).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when no events are pending.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        totals = {}
+
+        try:
+            while True:
+                results = process_pending_events(batch_size)
+                for status, count in results.items():
+                    totals[status] = totals.get(status, 0) + count
+
+                if results:
+                    self.stdout.write(", ".join(f"{count} {status}" for status, count in results.items()))
+
+                if sum(results.values()) < batch_size:
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        summary = ", ".join(f"{count} {status}" for status, count in totals.items()) or "nothing to do"
+        self.stdout.write(self.style.SUCCESS(f"Stripe events: {summary}."))
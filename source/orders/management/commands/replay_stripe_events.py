@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from orders.models import StripeEvent
+from orders.stripe_events import process_pending_events, replay_events
+
+
+class Command(BaseCommand):
+    help = "Queue recorded Stripe events to be applied again."
+
+    def add_arguments(self, parser):
+        parser.add_argument("event_ids", nargs="*", help="Stripe event ids (evt_...).")
+        parser.add_argument("--failed", action="store_true", help="Replay every failed event.")
+        parser.add_argument("--type", help="Only events of this type.")
+        parser.add_argument("--order", type=int, help="Only events for this order id.")
+        parser.add_argument("--since", help="Only events received at or after this ISO datetime.")
+        parser.add_argument(
+            "--process",
+            action="store_true",
+            help="Apply the replayed events now instead of leaving them to the worker.",
+        )
+
+    def handle(self, *args, **options):
+        events = StripeEvent.objects.all()
+        filtered = False
+
+        if options["event_ids"]:
+            events = events.filter(event_id__in=options["event_ids"])
+            filtered = True
+        if options["failed"]:
+            events = events.filter(status=StripeEvent.FAILED)
+            filtered = True
+        if options["type"]:
+            events = events.filter(type=options["type"])
+            filtered = True
+        if options["order"]:
+            events = events.filter(order_id=options["order"])
+            filtered = True
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None:
+                raise CommandError(f"Invalid datetime: {options['since']}")
+            events = events.filter(received_at__gte=since)
+            filtered = True
+
+        if not filtered:
+            raise CommandError("Give event ids or at least one filter.")
+
+        queued = replay_events(events)
+        self.stdout.write(f"Queued {queued} event(s) for replay.")
+
+        if options["process"] and queued:
+            results = {}
+            while True:
+                batch = process_pending_events()
+                for status, count in batch.items():
+                    results[status] = results.get(status, 0) + count
+                if not batch:
+                    break
+            summary = ", ".join(f"{count} {status}" for status, count in results.items())
+            self.stdout.write(self.style.SUCCESS(f"Applied: {summary or 'nothing due'}."))
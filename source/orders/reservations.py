@@ -0,0 +1,161 @@
+# orders/reservations.py
+"""
+Stock reservations for pending orders.
+
+Stock is taken off sale when the order is created, using one conditional
+UPDATE for the whole basket, so concurrent checkouts can never oversell.
+Each hold expires after STOCK_RESERVATION_MINUTES if the Stripe session
+is abandoned. Expired holds go back on sale through
+release_expired_reservations().
+"""
+from collections import defaultdict
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+from products.models import Product, StockMovement
+from products.stock import availability_changed, per_product, record_movements
+from .models import StockReservation
+
+
+class StockShortfall(NamedTuple):
+    product_id: int
+    title: str
+    requested: int
+    available: int
+
+
+class InsufficientStock(Exception):
+    """
+    Raised when one or more basket lines cannot be reserved.
+    `failures` lists a StockShortfall per failing line.
+    """
+
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__(
+            ", ".join(f"{f.title}: {f.requested} requested, {f.available} available" for f in failures)
+        )
+
+
+class _ReservationFailed(Exception):
+    pass
+
+
+def reservation_expiry():
+    return now() + timedelta(minutes=settings.STOCK_RESERVATION_MINUTES)
+
+
+def reserve_stock(order, quantities):
+    """
+    Hold stock for every line of an order in one round trip.
+
+    quantities: {product_id: quantity}
+
+    Either every line is reserved or none is; on failure InsufficientStock
+    reports each short line.
+    """
+    if not quantities:
+        return []
+
+    requested = per_product(quantities)
+    try:
+        with transaction.atomic():
+            updated = (
+                Product.objects
+                .filter(pk__in=quantities, stock_quantity__gte=requested)
+                .update(
+                    stock_quantity=F("stock_quantity") - requested,
+                    updated_at=now(),
+                )
+            )
+            if updated != len(quantities):
+                # Roll back the lines that did succeed.
+                raise _ReservationFailed
+            # Only lines with stock were reserved, so a zero is a sell-out.
+            if Product.objects.filter(pk__in=quantities, stock_quantity=0).exists():
+                availability_changed()
+    except _ReservationFailed:
+        stock = {
+            pk: (title, stock_quantity)
+            for pk, title, stock_quantity in Product.objects
+            .filter(pk__in=quantities)
+            .values_list("pk", "title", "stock_quantity")
+        }
+        failures = []
+        for product_id, quantity in quantities.items():
+            title, available = stock.get(product_id, ("Unavailable product", 0))
+            if available < quantity:
+                failures.append(StockShortfall(product_id, title, quantity, available))
+        raise InsufficientStock(failures)
+
+    record_movements(
+        {product_id: -quantity for product_id, quantity in quantities.items()},
+        kind=StockMovement.RESERVATION,
+        order=order,
+    )
+
+    expires_at = reservation_expiry()
+    return StockReservation.objects.bulk_create([
+        StockReservation(
+            order=order,
+            product_id=product_id,
+            quantity=quantity,
+            expires_at=expires_at,
+        )
+        for product_id, quantity in quantities.items()
+    ])
+
+
+def release_reservations(reservations):
+    """
+    Put held stock back on sale. Returns the number of reservations released.
+    """
+    with transaction.atomic():
+        held = list(
+            reservations
+            .select_for_update()
+            .filter(status=StockReservation.HELD)
+            .values_list("pk", "order_id", "product_id", "quantity")
+        )
+        if not held:
+            return 0
+
+        quantities = defaultdict(int)
+        for _, _, product_id, quantity in held:
+            quantities[product_id] += quantity
+
+        back_on_sale = Product.objects.filter(pk__in=quantities, stock_quantity__lte=0).exists()
+        Product.objects.filter(pk__in=quantities).update(
+            stock_quantity=F("stock_quantity") + per_product(quantities),
+            updated_at=now(),
+        )
+        if back_on_sale:
+            availability_changed()
+        # One movement per reservation, so each release stays tied to its order.
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                product_id=product_id,
+                order_id=order_id,
+                kind=StockMovement.RELEASE,
+                quantity=quantity,
+            )
+            for _, order_id, product_id, quantity in held
+        ])
+        StockReservation.objects.filter(pk__in=[pk for pk, _, _, _ in held]).update(
+            status=StockReservation.RELEASED,
+        )
+    return len(held)
+
+
+def release_expired_reservations():
+    return release_reservations(
+        StockReservation.objects.filter(
+            status=StockReservation.HELD,
+            expires_at__lte=now(),
+        )
+    )
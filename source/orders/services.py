@@ -1,18 +1,70 @@
+from collections import defaultdict
+
 from django.db import transaction
-from products.models import Product
-from .models import Order, OrderItem
+from basket.utils import parse_basket
+from products.models import Product, StockMovement
+from products.stock import return_stock, take_stock
+from .models import Order, OrderItem, StockReservation
+from .reservations import reserve_stock
+
+
+class PriceChanged(ValueError):
+    """
+    Raised when the basket was priced against different product prices
+    (or lines) than the ones locked for the order.
+    """
 
 
 @transaction.atomic
 def create_order_from_basket(*, basket, user_info, pricing):
     """
-    Create an Order + OrderItems from session basket.
+    Create an Order + OrderItems from the basket.
 
-    basket: {product_id (str|int): quantity}
+    basket: {product_id (int|str): quantity}
     user_info: dict from session
-    pricing: output of calculate_basket()
+    pricing: BasketPricing returned by calculate_basket()
+
+    All products are locked with one select_for_update ordered by id
+    (so concurrent checkouts always lock in the same order and cannot
+    deadlock), validated against `pricing` in memory, and the items are
+    inserted with one bulk_create. Stock for every line is reserved in
+    the same transaction; raises InsufficientStock if any line cannot be
+    fulfilled and PriceChanged if the basket needs re-pricing.
     """
 
+    requested = parse_basket(basket)
+
+    products = {
+        product.pk: product
+        for product in Product.objects
+        .select_for_update()
+        .filter(pk__in=list(requested))
+        .order_by("pk")
+    }
+
+    priced_lines = {line.product.pk: line for line in pricing.products}
+
+    quantities = {}
+
+    for product_id, quantity in requested.items():
+        product = products.get(product_id)
+        line = priced_lines.get(product_id)
+
+        if product is None:
+            if line is None:
+                # Stale basket entry, already left out of the pricing
+                continue
+            raise ValueError(f"Product {product_id} no longer exists")
+
+        if (
+            line is None
+            or line.quantity != quantity
+            or line.unit_price != product.effective_price
+        ):
+            raise PriceChanged(f"Price of {product.title} changed during checkout")
+
+        quantities[product_id] = quantity
+
     order = Order.objects.create(
         full_name=user_info["full_name"],
         email=user_info["email"],
@@ -21,46 +73,37 @@ def create_order_from_basket(*, basket, user_info, pricing):
         city=user_info["city"],
         postal_code=user_info["postal_code"],
         country=user_info["country"],
-        subtotal=pricing["total"],
-        delivery_fee=pricing["delivery_fee"],
-        total=pricing["final_total"],
+        subtotal=pricing.total,
+        delivery_fee=pricing.delivery_fee,
+        total=pricing.final_total,
     )
 
-    for raw_product_id, quantity in basket.items():
-        product_id = int(raw_product_id)
-
-        try:
-            product = (
-                Product.objects
-                .select_for_update()
-                .get(pk=product_id)
-            )
-        except Product.DoesNotExist:
-            raise ValueError(f"Product {product_id} no longer exists")
-
-        if quantity <= 0:
-            continue
-
-        OrderItem.objects.create(
+    OrderItem.objects.bulk_create([
+        OrderItem(
             order=order,
-            product=product,
-            product_title=product.title,
-            unit_price=product.effective_price,
+            product=products[product_id],
+            product_title=products[product_id].title,
+            unit_price=priced_lines[product_id].unit_price,
             quantity=quantity,
         )
+        for product_id, quantity in quantities.items()
+    ])
+
+    reserve_stock(order, quantities)
 
     return order
 
 
-# orders/services.py
-from django.db import transaction
-from products.models import Product
-from .models import Order
-
 def mark_order_as_paid(order: Order, payment_intent_id: str):
     """
     Idempotent order finalisation.
     Safe to call multiple times.
+
+    Held reservations are confirmed (their stock was already taken at
+    checkout). Lines whose hold expired before payment arrived were put
+    back on sale, so their stock is taken now, in one UPDATE for all
+    such lines (floored at zero) with their StockMovement rows inserted
+    in bulk.
     """
 
     if order.status == "paid":
@@ -71,10 +114,45 @@ def mark_order_as_paid(order: Order, payment_intent_id: str):
         order.stripe_payment_intent = payment_intent_id
         order.save(update_fields=["status", "stripe_payment_intent", "updated_at"])
 
-        for item in order.items.select_for_update():
-            product = item.product
-            product.stock_quantity = max(
-                product.stock_quantity - item.quantity,
-                0
-            )
-            product.save(update_fields=["stock_quantity"])
+        order.reservations.filter(status=StockReservation.HELD).update(
+            status=StockReservation.CONFIRMED,
+        )
+        reserved = order.reservations.filter(
+            status=StockReservation.CONFIRMED,
+        ).values("product_id")
+
+        unreserved = defaultdict(int)
+        for product_id, quantity in (
+            order.items.exclude(product_id__in=reserved).values_list("product_id", "quantity")
+        ):
+            unreserved[product_id] += quantity
+
+        take_stock(unreserved, kind=StockMovement.SALE, order=order)
+
+
+@transaction.atomic
+def refund_order_items(order: Order, quantities=None):
+    """
+    Record refunded quantities and put the stock back on sale.
+
+    quantities: {order_item_id: quantity}; defaults to everything not yet
+    refunded. Quantities are capped at what is still refundable.
+    Returns {product_id: quantity} restocked.
+    """
+
+    refunded = []
+    restock = defaultdict(int)
+
+    for item in order.items.select_for_update():
+        outstanding = item.quantity - item.refunded_quantity
+        quantity = outstanding if quantities is None else min(quantities.get(item.pk, 0), outstanding)
+        if quantity <= 0:
+            continue
+
+        item.refunded_quantity += quantity
+        refunded.append(item)
+        restock[item.product_id] += quantity
+
+    OrderItem.objects.bulk_update(refunded, ["refunded_quantity"])
+    return_stock(restock, kind=StockMovement.REFUND, order=order)
+    return dict(restock)
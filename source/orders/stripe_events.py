@@ -0,0 +1,163 @@
+# orders/stripe_events.py
+"""
+Deferred processing of Stripe webhook events.
+
+Events are applied one at a time, each in its own transaction, with the
+order row locked (SELECT ... FOR UPDATE) first. Concurrent deliveries or
+workers touching the same order therefore run one after the other, which
+makes the status checks in mark_order_as_paid() safe.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+
+from .emails import send_order_emails
+from .models import Order, StockReservation, StripeEvent
+from .reservations import release_reservations
+from .services import mark_order_as_paid
+
+MAX_ATTEMPTS = getattr(settings, "STRIPE_EVENT_MAX_ATTEMPTS", 5)
+RETRY_BASE_SECONDS = 30
+
+
+def _order_id(payload):
+    metadata = payload.get("data", {}).get("object", {}).get("metadata") or {}
+    try:
+        return int(metadata.get("order_id"))
+    except (TypeError, ValueError):
+        # Stripe CLI test events often have no metadata
+        return None
+
+
+def record_event(payload):
+    """
+    Store a verified event. Returns (event, created); a redelivered
+    event id returns the existing row.
+    """
+    try:
+        with transaction.atomic():
+            return StripeEvent.objects.create(
+                event_id=payload["id"],
+                type=payload["type"],
+                order_id=_order_id(payload),
+                payload=payload,
+            ), True
+    except IntegrityError:
+        return StripeEvent.objects.get(event_id=payload["id"]), False
+
+
+# -------------------------
+# HANDLERS
+# -------------------------
+
+def _locked_order(event):
+    if event.order_id is None:
+        return None
+    # Order deleted or never created: nothing to do
+    return Order.objects.select_for_update().filter(pk=event.order_id).first()
+
+
+def handle_checkout_completed(event):
+    order = _locked_order(event)
+    if order is None:
+        return
+
+    session = event.payload["data"]["object"]
+    mark_order_as_paid(order, session.get("payment_intent"))
+    send_order_emails(order)
+
+
+def handle_checkout_expired(event):
+    order = _locked_order(event)
+    if order is None:
+        return
+
+    release_reservations(
+        StockReservation.objects.filter(order=order)
+    )
+
+
+HANDLERS = {
+    "checkout.session.completed": handle_checkout_completed,
+    "checkout.session.expired": handle_checkout_expired,
+}
+
+
+# -------------------------
+# PROCESSING
+# -------------------------
+
+def process_event(pk):
+    """
+    Apply one pending event. Returns its new status, or None if another
+    worker holds it or it is no longer pending.
+    """
+    with transaction.atomic():
+        event = (
+            StripeEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(pk=pk, status=StripeEvent.PENDING)
+            .first()
+        )
+        if event is None:
+            return None
+
+        handler = HANDLERS.get(event.type)
+        event.attempts += 1
+
+        try:
+            # Savepoint: a failing handler leaves no partial writes behind.
+            with transaction.atomic():
+                if handler:
+                    handler(event)
+        except Exception as exc:
+            event.last_error = f"{type(exc).__name__}: {exc}"
+            if event.attempts >= MAX_ATTEMPTS:
+                event.status = StripeEvent.FAILED
+            else:
+                delay = RETRY_BASE_SECONDS * 2 ** (event.attempts - 1)
+                event.next_attempt_at = now() + timedelta(seconds=delay)
+        else:
+            event.status = StripeEvent.PROCESSED if handler else StripeEvent.IGNORED
+            event.processed_at = now()
+            event.last_error = ""
+
+        event.save(update_fields=[
+            "status", "attempts", "next_attempt_at", "last_error", "processed_at",
+        ])
+        return event.status
+
+
+def process_pending_events(batch_size=50):
+    """
+    Apply up to `batch_size` due events, oldest first.
+    Returns {status: count} for the events handled.
+    """
+    due = list(
+        StripeEvent.objects
+        .filter(status=StripeEvent.PENDING, next_attempt_at__lte=now())
+        .order_by("received_at")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+
+    results = {}
+    for pk in due:
+        status = process_event(pk)
+        if status is not None:
+            results[status] = results.get(status, 0) + 1
+    return results
+
+
+def replay_events(queryset):
+    """
+    Queue events to be applied again. Handlers are idempotent, so replaying
+    an already processed event is safe. Returns the number queued.
+    """
+    return queryset.update(
+        status=StripeEvent.PENDING,
+        attempts=0,
+        next_attempt_at=now(),
+        last_error="",
+    )
@@ -0,0 +1,52 @@
+from django.contrib import admin, messages
+from django.utils.timezone import now
+
+from .models import OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        "subject",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "created_at",
+        "sent_at",
+    )
+
+    list_filter = ("status", "created_at")
+    search_fields = ("subject", "recipients", "idempotency_key")
+    ordering = ("-created_at",)
+
+    readonly_fields = (
+        "subject",
+        "from_email",
+        "recipients",
+        "body",
+        "html_body",
+        "idempotency_key",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "last_error",
+        "created_at",
+        "sent_at",
+    )
+
+    actions = ("retry_now",)
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Retry now")
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=OutboundEmail.SENT).update(
+            status=OutboundEmail.PENDING,
+            next_attempt_at=now(),
+        )
+        self.message_user(
+            request,
+            f"{updated} email(s) queued for immediate delivery.",
+            messages.SUCCESS,
+        )
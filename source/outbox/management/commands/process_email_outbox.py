@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from outbox.queue import deliver_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued emails in batches over one SMTP connection. "
+        "Runs until interrupted unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain everything that is due, then exit (for cron).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        total_sent = total_failed = 0
+
+        try:
+            while True:
+                sent, failed = deliver_batch(batch_size)
+                total_sent += sent
+                total_failed += failed
+
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent}, failed {failed}.")
+
+                if sent + failed < batch_size:
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox processed: {total_sent} sent, {total_failed} failed."
+        ))
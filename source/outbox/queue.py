@@ -0,0 +1,168 @@
+# outbox/queue.py
+"""
+Database-backed outbound email queue.
+
+Requests only insert rows; the process_email_outbox worker delivers them
+in batches over a single SMTP connection, retrying failures with
+exponential backoff.
+
+A worker claims a batch in a short transaction by pushing the rows'
+next_attempt_at out by LEASE_SECONDS, then sends with no transaction or
+row locks held and records each result as it goes. If the worker dies,
+unrecorded rows come due again when the lease runs out.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+
+from core.email_utils import build_company_email
+from .models import OutboundEmail
+
+MAX_ATTEMPTS = getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 6)
+RETRY_BASE_SECONDS = getattr(settings, "EMAIL_OUTBOX_RETRY_BASE_SECONDS", 60)
+RETRY_MAX_SECONDS = 60 * 60
+# How long a claimed batch is hidden from other workers while it is sent.
+LEASE_SECONDS = 10 * 60
+
+
+def _new_email(subject, message, recipient_list, html_message=None, idempotency_key=None):
+    return OutboundEmail(
+        subject=subject,
+        body=message or "",
+        html_body=html_message or "",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+        idempotency_key=idempotency_key,
+    )
+
+
+def enqueue(subject, message, recipient_list, html_message=None, idempotency_key=None):
+    """
+    Queue one email. With an idempotency key, an existing row is returned
+    instead of queueing a duplicate.
+    """
+    email = _new_email(subject, message, recipient_list, html_message, idempotency_key)
+
+    if idempotency_key is None:
+        email.save()
+        return email
+
+    try:
+        with transaction.atomic():
+            email.save()
+    except IntegrityError:
+        existing = OutboundEmail.objects.filter(idempotency_key=idempotency_key).first()
+        if existing is None:
+            raise
+        return existing
+    return email
+
+
+def enqueue_many(emails):
+    """
+    Queue several emails in one insert. `emails` is an iterable of dicts
+    with enqueue()'s keyword arguments. A repeated idempotency key raises
+    IntegrityError; queue keyed emails with enqueue() to skip duplicates.
+    """
+    return OutboundEmail.objects.bulk_create(
+        [_new_email(**email) for email in emails],
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def _record_failure(email, exc):
+    email.attempts += 1
+    email.last_error = f"{type(exc).__name__}: {exc}"
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = OutboundEmail.FAILED
+    else:
+        email.next_attempt_at = now() + retry_delay(email.attempts)
+
+
+def _record_sent(email):
+    email.attempts += 1
+    email.status = OutboundEmail.SENT
+    email.sent_at = now()
+    email.last_error = ""
+
+
+def _save_result(email):
+    OutboundEmail.objects.filter(pk=email.pk).update(
+        status=email.status,
+        attempts=email.attempts,
+        next_attempt_at=email.next_attempt_at,
+        last_error=email.last_error,
+        sent_at=email.sent_at,
+    )
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to `batch_size` due emails to this worker and return them.
+
+    Rows are locked with SKIP LOCKED only while the lease is written, so
+    several workers can drain the queue side by side without sending
+    anything twice.
+    """
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now())
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if batch:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+                next_attempt_at=now() + timedelta(seconds=LEASE_SECONDS),
+            )
+    return batch
+
+
+def deliver_batch(batch_size=50):
+    """
+    Send up to `batch_size` due emails over one SMTP connection.
+    Returns (sent, failed) counts for the batch.
+    """
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    sent = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        # Mail server unreachable: back off the whole batch.
+        for email in batch:
+            _record_failure(email, exc)
+            _save_result(email)
+        return 0, len(batch)
+
+    try:
+        for email in batch:
+            try:
+                build_company_email(
+                    subject=email.subject,
+                    message=email.body,
+                    recipient_list=email.recipients,
+                    html_message=email.html_body or None,
+                    connection=connection,
+                    from_email=email.from_email,
+                ).send()
+            except Exception as exc:
+                _record_failure(email, exc)
+            else:
+                _record_sent(email)
+                sent += 1
+            # Recorded one by one, so a crash never re-sends delivered mail.
+            _save_result(email)
+    finally:
+        connection.close()
+
+    return sent, len(batch) - sent
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.contrib.admin import DateFieldListFilter
 from django.utils.html import format_html
-from .models import Product, ProductSettings
+from .models import InventorySnapshot, Product, ProductSettings, StockMovement
+from .stock import record_movements
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 
@@ -104,9 +105,66 @@ class ProductAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        """
+        Record stock edits in the movement ledger. The row is locked and
+        the change measured against the stored value, so stock taken by a
+        checkout while the form was open is not silently misreported.
+        """
+        previous = 0
+        if change:
+            previous = (
+                Product.objects
+                .select_for_update()
+                .values_list("stock_quantity", flat=True)
+                .get(pk=obj.pk)
+            )
+
+        super().save_model(request, obj, form, change)
+
+        if obj.stock_quantity != previous:
+            record_movements(
+                {obj.pk: obj.stock_quantity - previous},
+                kind=StockMovement.ADJUSTMENT,
+                note=f"{'Edited' if change else 'Created'} in admin by {request.user}",
+            )
+
     def image_tag(self, obj):
         """Display a small thumbnail of the product image in the admin list view."""
         if obj.image:
             return format_html('<img src="{}" style="height:50px;"/>', obj.image.url)
         return "-"
     image_tag.short_description = "Image"
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ("product", "kind", "quantity", "order", "note", "created_at")
+    list_filter = ("kind", ("created_at", DateFieldListFilter))
+    search_fields = ("product__title", "order__reference", "note")
+    list_select_related = ("product", "order")
+    readonly_fields = ("product", "order", "kind", "quantity", "note", "created_at")
+
+    # The ledger is append-only.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InventorySnapshot)
+class InventorySnapshotAdmin(admin.ModelAdmin):
+    list_display = ("product", "quantity", "last_movement_id", "taken_at")
+    search_fields = ("product__title",)
+    list_select_related = ("product",)
+    readonly_fields = ("product", "quantity", "last_movement_id", "taken_at")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
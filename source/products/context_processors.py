@@ -1,11 +1,32 @@
+from django.utils.functional import SimpleLazyObject
 
+from core.cache_utils import get_or_set
 from .models import Product, ProductSettings
 
 
+def _featured_products():
+    return get_or_set(
+        "catalogue", "featured",
+        loader=lambda: list(Product.objects.filter(featured=True)),
+    )
+
+
+def _best_sellers():
+    return get_or_set(
+        "catalogue", "best_sellers",
+        loader=lambda: list(Product.objects.filter(best_seller=True)),
+    )
+
+
 def product_context(request):
+    """
+    Global catalogue context. Nothing here touches the database until a
+    template actually uses it; featured/best-seller lists are served from
+    the versioned cache and the pricing settings from the singleton cache.
+    """
     return {
         "products": Product.objects.all(),
-        "featured_products": Product.objects.filter(featured=True),
-        "best_sellers": Product.objects.filter(best_seller=True),
-        "products_settings": ProductSettings.objects.first(),
+        "featured_products": SimpleLazyObject(_featured_products),
+        "best_sellers": SimpleLazyObject(_best_sellers),
+        "products_settings": SimpleLazyObject(ProductSettings.objects.get_solo),
     }
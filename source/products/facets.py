@@ -0,0 +1,144 @@
+"""
+Facet counts for the product listing filters.
+
+All counts for the current filter state come from one conditional
+aggregate over the listing's base queryset. Each facet is counted with
+every *other* active filter applied, so shoppers see how many products
+they would get by switching that option. Results are cached in the
+versioned catalogue namespace.
+"""
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Q
+
+from core.cache_utils import get_or_set
+from .models import Product
+
+CHOICE_FACETS = {
+    "scent": Product.Scent,
+    "size": Product.Size,
+    "color": Product.Color,
+}
+
+# "Max price" options offered in the sidebar. A different ?price= (old
+# links, typed URLs) is offered alongside them so it still shows selected.
+PRICE_BUCKETS = (Decimal("10"), Decimal("20"), Decimal("30"), Decimal("50"))
+
+# Bounded because the "new" listing depends on the current time.
+FACET_CACHE_SECONDS = 300
+
+
+def parse_price(value):
+    try:
+        price = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return price if price.is_finite() else None
+
+
+def price_buckets(selected):
+    if selected is None or selected in PRICE_BUCKETS:
+        return PRICE_BUCKETS
+    return tuple(sorted((*PRICE_BUCKETS, selected)))
+
+
+def attribute_filters(params):
+    """
+    Build {facet name: Q} for the scent/size/colour/price filters present
+    in the request parameters.
+    """
+    filters = {}
+    for name in CHOICE_FACETS:
+        value = params.get(name)
+        if value:
+            filters[name] = Q(**{name: value})
+
+    price = parse_price(params.get("price"))
+    if price is not None:
+        filters["price"] = Q(price__lte=price)
+    return filters
+
+
+def _others(filters, name):
+    return Q(*[q for other, q in filters.items() if other != name])
+
+
+def _compute(base_queryset, filters, buckets):
+    aggregates = {}
+    for name, choices in CHOICE_FACETS.items():
+        others = _others(filters, name)
+        for index, value in enumerate(choices.values):
+            aggregates[f"{name}_{index}"] = Count(
+                "pk", filter=others & Q(**{name: value})
+            )
+
+    others = _others(filters, "price")
+    for index, bucket in enumerate(buckets):
+        aggregates[f"price_{index}"] = Count(
+            "pk", filter=others & Q(price__lte=bucket)
+        )
+
+    row = base_queryset.order_by().aggregate(**aggregates)
+
+    counts = {
+        name: {value: row[f"{name}_{index}"] for index, value in enumerate(choices.values)}
+        for name, choices in CHOICE_FACETS.items()
+    }
+    counts["price"] = {
+        str(bucket): row[f"price_{index}"] for index, bucket in enumerate(buckets)
+    }
+    return counts
+
+
+def facet_counts(base_queryset, params, cache_parts=()):
+    """
+    Return {facet: {value: count}} for the listing's base queryset.
+
+    `cache_parts` identifies the base queryset (product type, special
+    filter, search) so the cached summary can be reused across requests.
+    """
+    filters = attribute_filters(params)
+    buckets = price_buckets(parse_price(params.get("price")))
+    state = [*map(str, cache_parts)] + [
+        f"{name}={params.get(name, '')}" for name in (*CHOICE_FACETS, "price")
+    ]
+    digest = hashlib.md5("|".join(state).encode()).hexdigest()
+    return get_or_set(
+        "catalogue", "facets", digest,
+        loader=lambda: _compute(base_queryset, filters, buckets),
+        timeout=FACET_CACHE_SECONDS,
+    )
+
+
+def build_facets(counts, params):
+    """
+    Shape counts for the filter sidebar: one list of options per facet,
+    with empty options dropped unless currently selected.
+    """
+    facets = {}
+    for name, choices in CHOICE_FACETS.items():
+        selected = params.get(name, "")
+        facets[name] = [
+            {
+                "value": value,
+                "label": label,
+                "count": counts[name][value],
+                "selected": value == selected,
+            }
+            for value, label in choices.choices
+            if counts[name][value] or value == selected
+        ]
+
+    selected_price = parse_price(params.get("price"))
+    facets["price"] = [
+        {
+            "value": value,
+            "label": f"Up to £{value}",
+            "count": count,
+            "selected": selected_price is not None and Decimal(value) == selected_price,
+        }
+        for value, count in counts["price"].items()
+        if count or (selected_price is not None and Decimal(value) == selected_price)
+    ]
+    return facets
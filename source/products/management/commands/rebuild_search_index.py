@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+from products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index from scratch."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.ensure_schema()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {Product.objects.count()} product(s) with {type(backend).__name__}."
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.stock import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Check Product.stock_quantity against the stock movement ledger. "
+        "Exits with an error if any product is out of balance."
+    )
+
+    def handle(self, *args, **options):
+        mismatches = reconcile()
+
+        for product, ledger_quantity in mismatches:
+            self.stdout.write(
+                f"{product.title} (#{product.pk}): stock {product.stock_quantity}, "
+                f"ledger {ledger_quantity} ({product.stock_quantity - ledger_quantity:+d})"
+            )
+
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} product(s) out of balance.")
+
+        self.stdout.write(self.style.SUCCESS("Stock matches the ledger."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.stock import take_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Snapshot on-hand stock for every product so ledger reads only scan "
+        "recent movements. Run nightly from cron."
+    )
+
+    def handle(self, *args, **options):
+        taken = take_snapshots()
+        self.stdout.write(self.style.SUCCESS(f"Took {taken} inventory snapshot(s)."))
@@ -1,23 +1,23 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.urls import reverse
-from django.utils.text import slugify
 from django.utils.text import Truncator
-import uuid
 import json
 from django.utils import timezone
 
+from core.cache_utils import get_or_set, get_version
+from core.singletons import SingletonManager
+from images.renditions import rendition_url
+from .slugs import unique_slug
+
+
+# Attempts at saving a new product before a slug clash is re-raised.
+SLUG_SAVE_ATTEMPTS = 5
+
 
 def generate_unique_slug(instance, base=None, max_length=50):
-    base_slug = slugify(base) if base else f"product-{uuid.uuid4().hex[:8]}"
-    base_slug = base_slug[:max_length]
-    slug = base_slug
-    counter = 1
-    ModelClass = instance.__class__
-    while ModelClass.objects.filter(slug=slug).exclude(pk=instance.pk).exists():
-        slug = f"{base_slug[:max_length-5]}-{counter}"
-        counter += 1
-    return slug
+    return unique_slug(instance.__class__, base, exclude_pk=instance.pk, max_length=max_length)
 
 
 class ProductQuerySet(models.QuerySet):
@@ -32,11 +32,8 @@ class ProductQuerySet(models.QuerySet):
 
         if days is None:
             # Get the default from StoreSettingsAdmin
-            try:
-                settings_instance = ProductSettings.objects.first()
-                days = settings_instance.new_product_days if settings_instance else 30
-            except ProductSettings.DoesNotExist:
-                days = 30
+            settings_instance = ProductSettings.objects.get_solo()
+            days = settings_instance.new_product_days if settings_instance else 30
 
         threshold = timezone.now() - timezone.timedelta(days=days)
         return self.filter(created_at__gte=threshold).order_by("-created_at")
@@ -46,6 +43,8 @@ class ProductQuerySet(models.QuerySet):
 
 
 class ProductSettings(models.Model):
+    objects = SingletonManager()
+
     delivery_fee = models.DecimalField(
         max_digits=6,
         decimal_places=2,
@@ -214,18 +213,36 @@ class Product(models.Model):
         blank=True,
         null=True
     )
+
+    # Maintained by products.search on PostgreSQL; unused on SQLite.
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False
+    )
     # -----------------
     # Meta property for templates
     # -----------------
     @property
     def meta(self):
+        """
+        SEO metadata, cached per product version. Any change to the product
+        (stock and price updates included) moves updated_at and so misses;
+        a finished image rendition bumps the images version.
+        """
+        return get_or_set(
+            "seo_meta", "product", self.pk, self.updated_at.isoformat(), get_version("images"),
+            loader=self.build_meta,
+            timeout=settings.CATALOGUE_CACHE_SECONDS,
+        )
+
+    def build_meta(self):
         site_url = getattr(settings, "SITE_URL", "https://lelseasmelts.com")
         absolute_url = self.canonical_url or f"{site_url}{self.get_absolute_url()}"
 
         title = self.seo_title or self.title
         description = self.seo_description or Truncator(self.description).chars(155)
-        image_url = (f"{site_url}{self.og_image.url}" if self.og_image else
-                    f"{site_url}{self.image.url}" if self.image else None)
+        og_source = self.og_image or self.image
+        image_url = f"{site_url}{rendition_url(og_source, 'og')}" if og_source else None
         availability = "https://schema.org/InStock" if self.stock_quantity > 0 else "https://schema.org/OutOfStock"
 
         json_ld = {
@@ -283,9 +300,29 @@ class Product(models.Model):
     # Slug auto-generation & SEO fallbacks
     # -----------------
     def save(self, *args, **kwargs):
-        if not self.slug:
+        if self.slug:
+            self.apply_seo_defaults()
+            return super().save(*args, **kwargs)
+
+        # Two saves can allocate the same slug at once; the unique
+        # constraint decides and the loser allocates again.
+        canonical_url = self.canonical_url
+        for attempt in range(SLUG_SAVE_ATTEMPTS):
             self.slug = generate_unique_slug(self, base=self.title)
-
+            self.canonical_url = canonical_url
+            self.apply_seo_defaults()
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                clash = Product.objects.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                if not clash or attempt == SLUG_SAVE_ATTEMPTS - 1:
+                    raise
+
+    def apply_seo_defaults(self):
+        """
+        Fill blank canonical URL and SEO fields. Needs the slug to be set.
+        """
         site_url = getattr(settings, "SITE_URL", "https://lelseasmelts.com")
 
         if not self.canonical_url:
@@ -311,8 +348,6 @@ class Product(models.Model):
                 "Lelsea’s Melts",
             ]))
 
-        super().save(*args, **kwargs)
-
 
 
     # -----------------
@@ -341,3 +376,91 @@ class Product(models.Model):
             return min(self.discount_price, self.price)
         return self.price
 
+
+
+class StockMovement(models.Model):
+    """
+    Append-only record of a change to Product.stock_quantity.
+    `quantity` is signed: negative when stock leaves, positive when it returns.
+
+    Stock held at checkout is recorded as a reservation and, if the
+    checkout is abandoned, a release; confirming a paid reservation moves
+    nothing. Lines paid after their hold expired are recorded as sales.
+    """
+
+    SALE = "sale"
+    REFUND = "refund"
+    ADJUSTMENT = "adjustment"
+    RESERVATION = "reservation"
+    RELEASE = "release"
+
+    KIND_CHOICES = (
+        (SALE, "Sale"),
+        (REFUND, "Refund"),
+        (ADJUSTMENT, "Manual adjustment"),
+        (RESERVATION, "Checkout reservation"),
+        (RELEASE, "Reservation released"),
+    )
+
+    # Deleting a product keeps its movements for the audit trail. Products
+    # that appear on orders stay protected by OrderItem.product.
+    product = models.ForeignKey(
+        Product,
+        related_name="stock_movements",
+        on_delete=models.SET_NULL,
+        null=True,
+    )
+
+    order = models.ForeignKey(
+        "orders.Order",
+        related_name="stock_movements",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.IntegerField()
+    note = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['product', 'created_at']),
+            # Derived stock scans each product's movements after its snapshot.
+            models.Index(fields=['product', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quantity:+d} {self.product_id}"
+
+
+class InventorySnapshot(models.Model):
+    """
+    On-hand quantity of a product as of a point in the movement ledger.
+
+    Derived stock is the latest snapshot plus the movements recorded after
+    `last_movement_id`, so reads only scan the tail since the last
+    snapshot and never touch the Product row.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        related_name="inventory_snapshots",
+        on_delete=models.CASCADE,
+    )
+
+    quantity = models.IntegerField()
+    last_movement_id = models.BigIntegerField(default=0)
+    taken_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-taken_at']
+        indexes = [
+            models.Index(fields=['product', '-last_movement_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.quantity} @ {self.last_movement_id}"
@@ -0,0 +1,99 @@
+"""
+Keyset (cursor) pagination for product listings.
+
+Pages are fetched with `WHERE (title, id) > (last title, last id)` instead
+of OFFSET, and no COUNT(*) is issued, so every page costs the same no
+matter how deep a crawler or infinite scroll goes. Cursors are opaque,
+URL-safe tokens.
+"""
+import base64
+import json
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(direction, product):
+    payload = json.dumps([direction, product.title, product.pk], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, title, pk = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+    if direction not in ("next", "prev") or not isinstance(title, str) or not isinstance(pk, int):
+        raise InvalidCursor(token)
+    return direction, title, pk
+
+
+class KeysetPage:
+    """
+    Minimal page object for templates: iterable, with next/prev cursors.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginate_keyset(queryset, cursor, per_page):
+    """
+    Return a KeysetPage of `queryset` ordered by (title, id).
+
+    An empty cursor means the first page. Raises InvalidCursor for tokens
+    that cannot be decoded.
+    """
+    direction, title, pk = decode_cursor(cursor) if cursor else ("next", None, None)
+    forward = direction == "next"
+
+    if title is None:
+        queryset = queryset.order_by("title", "pk")
+    elif forward:
+        queryset = queryset.filter(
+            Q(title__gt=title) | Q(title=title, pk__gt=pk)
+        ).order_by("title", "pk")
+    else:
+        queryset = queryset.filter(
+            Q(title__lt=title) | Q(title=title, pk__lt=pk)
+        ).order_by("-title", "-pk")
+
+    # One extra row tells us whether another page exists in this direction.
+    rows = list(queryset[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage([])
+
+    has_next = has_more if forward else True
+    has_previous = (title is not None) if forward else has_more
+
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor("next", rows[-1]) if has_next else None,
+        previous_cursor=encode_cursor("prev", rows[0]) if has_previous else None,
+    )
@@ -0,0 +1,219 @@
+"""
+Product full-text search.
+
+PostgreSQL (production) keeps a weighted tsvector in Product.search_vector,
+backed by a GIN index. SQLite (DEBUG) keeps an FTS5 virtual table keyed by
+product id. Both are refreshed per product from post_save, and rank
+matches by title, then scent/keywords, then description.
+
+The engine-specific schema (GIN index, FTS table) is created by
+ensure_schema() after migrate, so the Product model stays the same on
+every database. backfill() runs right after it and indexes any product
+missing from the index (all of them on the first deploy), so search
+works without a manual rebuild_search_index.
+
+On SQLite only the best MAX_RESULTS matches are returned; PostgreSQL
+returns every match.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from .models import Product
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MAX_TOKENS = 8
+# SQLite: matches are ranked in FTS5 and passed back to the ORM as an id
+# list, so only the best MAX_RESULTS are kept (the rest never show).
+MAX_RESULTS = 500
+
+
+def _tokens(query):
+    return TOKEN_RE.findall(query.lower())[:MAX_TOKENS]
+
+
+class PostgresSearchBackend:
+    config = "english"
+    index_name = "product_search_gin"
+
+    def document(self):
+        return (
+            SearchVector("title", weight="A", config=self.config)
+            + SearchVector("scent", weight="B", config=self.config)
+            + SearchVector("seo_keywords", weight="B", config=self.config)
+            + SearchVector("description", weight="D", config=self.config)
+        )
+
+    def ensure_schema(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.index_name} "
+                f"ON {Product._meta.db_table} USING gin (search_vector)"
+            )
+
+    def backfill(self):
+        Product.objects.filter(search_vector__isnull=True).update(search_vector=self.document())
+
+    def index(self, pks):
+        Product.objects.filter(pk__in=pks).update(search_vector=self.document())
+
+    def remove(self, pks):
+        # The vector lives on the product row itself.
+        pass
+
+    def rebuild(self):
+        Product.objects.update(search_vector=self.document())
+
+    def search(self, queryset, query):
+        tokens = _tokens(query)
+        if not tokens:
+            return queryset
+
+        # Prefix-match every term so results update as the shopper types.
+        ts_query = SearchQuery(
+            " & ".join(f"{token}:*" for token in tokens),
+            search_type="raw",
+            config=self.config,
+        )
+        return (
+            queryset
+            .filter(search_vector=ts_query)
+            .annotate(search_rank=SearchRank(F("search_vector"), ts_query))
+            .order_by("-search_rank", "title")
+        )
+
+
+class SQLiteSearchBackend:
+    table = "products_product_fts"
+    # bm25 column weights: title, scent, keywords, description
+    weights = (10.0, 5.0, 3.0, 1.0)
+
+    def ensure_schema(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                "title, scent, keywords, description, "
+                "tokenize='porter unicode61')"
+            )
+
+    def backfill(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, scent, keywords, description) "
+                f"SELECT id, title, scent, seo_keywords, description "
+                f"FROM {Product._meta.db_table} "
+                f"WHERE id NOT IN (SELECT rowid FROM {self.table})"
+            )
+
+    def index(self, pks):
+        pks = list(pks)
+        if not pks:
+            return
+        placeholders = ", ".join(["%s"] * len(pks))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", pks
+            )
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, scent, keywords, description) "
+                f"SELECT id, title, scent, seo_keywords, description "
+                f"FROM {Product._meta.db_table} WHERE id IN ({placeholders})",
+                pks,
+            )
+
+    def remove(self, pks):
+        pks = list(pks)
+        if not pks:
+            return
+        placeholders = ", ".join(["%s"] * len(pks))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", pks
+            )
+
+    def rebuild(self):
+        self.ensure_schema()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, scent, keywords, description) "
+                f"SELECT id, title, scent, seo_keywords, description "
+                f"FROM {Product._meta.db_table}"
+            )
+
+    def search(self, queryset, query):
+        """
+        Return the best MAX_RESULTS matches, ordered by bm25 rank.
+        """
+        tokens = _tokens(query)
+        if not tokens:
+            return queryset
+
+        match = " ".join(f'"{token}"*' for token in tokens)
+        weights = ", ".join(map(str, self.weights))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY bm25({self.table}, {weights}) LIMIT {MAX_RESULTS}",
+                [match],
+            )
+            ranked_ids = [row[0] for row in cursor.fetchall()]
+
+        if not ranked_ids:
+            return queryset.none()
+
+        return (
+            queryset
+            .filter(pk__in=ranked_ids)
+            .annotate(search_rank=Case(
+                *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ranked_ids)],
+                output_field=IntegerField(),
+            ))
+            .order_by("search_rank", "title")
+        )
+
+
+class BasicSearchBackend:
+    """
+    Fallback for databases without a full-text engine.
+    """
+
+    def ensure_schema(self):
+        pass
+
+    def backfill(self):
+        pass
+
+    def index(self, pks):
+        pass
+
+    def remove(self, pks):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, queryset, query):
+        query = query.strip()
+        if not query:
+            return queryset
+        return queryset.filter(
+            Q(title__icontains=query) | Q(description__icontains=query)
+        )
+
+
+def get_search_backend():
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    if connection.vendor == "sqlite":
+        return SQLiteSearchBackend()
+    return BasicSearchBackend()
+
+
+def search_products(queryset, query):
+    """
+    Filter `queryset` to products matching `query`, ordered by relevance.
+    """
+    return get_search_backend().search(queryset, query)
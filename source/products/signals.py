@@ -0,0 +1,36 @@
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache_utils import bump_version
+from core.singletons import invalidate_singleton
+from .models import Product, ProductSettings
+from .search import get_search_backend
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_catalogue(sender, **kwargs):
+    bump_version("catalogue")
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    get_search_backend().index([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+def ensure_search_schema(sender, **kwargs):
+    # Nothing to index until the product table has been migrated.
+    if Product._meta.db_table not in connection.introspection.table_names():
+        return
+    backend = get_search_backend()
+    backend.ensure_schema()
+    backend.backfill()
+
+
+post_save.connect(invalidate_singleton, sender=ProductSettings)
+post_delete.connect(invalidate_singleton, sender=ProductSettings)
@@ -0,0 +1,126 @@
+"""
+Unique slug allocation.
+
+A title's slug is its slugified form ("lavender-wax-melt"), or, once that
+is taken, the stem plus the next numeric suffix ("lavender-wax-melt-7").
+The next suffix comes from one aggregate query over the slugs sharing
+the prefix, so allocating costs the same however many duplicates exist.
+Titles that end in a number of their own ("Lavender Wax Melt 2023") do
+not move the counter on; their slugs are only skipped over, which takes
+a second query when such titles share the stem.
+Concurrent saves that pick the same slug are resolved by the unique
+constraint: the loser allocates again (see Product.save()).
+"""
+import uuid
+
+from django.db.models import Count, IntegerField, Max, Q, Value
+from django.db.models.functions import Cast, Concat, Substr
+from django.utils.text import slugify
+
+MAX_LENGTH = 50
+# Room left for "-<n>" when a suffix is needed: any suffix the counter
+# hands out (up to MAX_SUFFIX) fits in max_length after the stem.
+SUFFIX_LENGTH = 8
+MAX_SUFFIX = 10 ** (SUFFIX_LENGTH - 1) - 1
+# A counter suffix: no leading zero, at most MAX_SUFFIX. Longer numbers
+# at the end of a title are never read as one.
+SUFFIX_RE = rf"[1-9][0-9]{{0,{SUFFIX_LENGTH - 2}}}"
+
+
+def slug_base(title, max_length=MAX_LENGTH):
+    base = slugify(title) if title else ""
+    return (base or f"product-{uuid.uuid4().hex[:8]}")[:max_length]
+
+
+def _stem(base, max_length):
+    return base[:max_length - SUFFIX_LENGTH]
+
+
+def _usage(queryset, base, max_length):
+    """
+    (is the bare base taken, highest numeric suffix in use or 0, suffixes
+    held by numbered titles) in one query, or two if there are any.
+    """
+    stem = _stem(base, max_length)
+    suffix = Substr("slug", len(stem) + 2)
+    suffixed = Q(slug__regex=rf"^{stem}-{SUFFIX_RE}$")
+    # "Lavender Wax Melt 2023" slugifies to "lavender-wax-melt-2023" by
+    # itself; the 2023 is part of the title, not a duplicate counter.
+    numbered = suffixed & Q(title__endswith=Concat(Value(" "), suffix))
+    candidates = queryset.filter(Q(slug=base) | Q(slug__startswith=f"{stem}-")).order_by()
+    row = candidates.aggregate(
+        taken=Count("pk", filter=Q(slug=base)),
+        highest=Max(Cast(suffix, IntegerField()), filter=suffixed & ~numbered),
+        numbered=Count("pk", filter=numbered),
+    )
+    reserved = set()
+    if row["numbered"]:
+        reserved = {
+            int(slug[len(stem) + 1:])
+            for slug in candidates.filter(numbered).values_list("slug", flat=True)
+        }
+    return bool(row["taken"]), row["highest"] or 0, reserved
+
+
+def _next_suffix(highest, reserved):
+    suffix = highest + 1
+    while suffix in reserved:
+        suffix += 1
+    return suffix
+
+
+def _with_suffix(stem, suffix):
+    if suffix > MAX_SUFFIX:
+        # Counter exhausted: a random tail SUFFIX_RE never matches.
+        return f"{stem}-x{uuid.uuid4().hex[:SUFFIX_LENGTH - 2]}"
+    return f"{stem}-{suffix}"
+
+
+class SlugAllocator:
+    """
+    Hand out unique slugs for many titles, querying each distinct base
+    once. Meant for bulk imports inside one process; slugs are not
+    reserved, so bulk_create can still hit the unique constraint if
+    another writer takes the same slug in between.
+    """
+
+    def __init__(self, model, max_length=MAX_LENGTH):
+        self.queryset = model._default_manager.all()
+        self.max_length = max_length
+        # {base: [bare base taken, highest suffix handed out, reserved suffixes]}
+        self._usage = {}
+
+    def allocate(self, title):
+        base = slug_base(title, self.max_length)
+        if base not in self._usage:
+            self._usage[base] = list(_usage(self.queryset, base, self.max_length))
+
+        usage = self._usage[base]
+        if not usage[0]:
+            usage[0] = True
+            return base
+        usage[1] = _next_suffix(usage[1], usage[2])
+        return _with_suffix(_stem(base, self.max_length), usage[1])
+
+
+def allocate_slugs(model, titles, max_length=MAX_LENGTH):
+    """
+    Return a unique slug for each title, in order.
+    """
+    allocator = SlugAllocator(model, max_length)
+    return [allocator.allocate(title) for title in titles]
+
+
+def unique_slug(model, title, exclude_pk=None, max_length=MAX_LENGTH):
+    """
+    Return a slug for `title` that no other row of `model` uses.
+    """
+    queryset = model._default_manager.all()
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+
+    base = slug_base(title, max_length)
+    taken, highest, reserved = _usage(queryset, base, max_length)
+    if not taken:
+        return base
+    return _with_suffix(_stem(base, max_length), _next_suffix(highest, reserved))
@@ -0,0 +1,243 @@
+"""
+Set-based stock updates and the stock movement ledger.
+
+Every helper here changes any number of products with one UPDATE keyed
+by product id and records the matching StockMovement rows with one
+insert, so the query count does not grow with the basket size. These
+updates skip Product.save(), so a product selling out or coming back on
+sale bumps the catalogue cache version here instead.
+
+On-hand stock can also be derived from the ledger alone: the latest
+InventorySnapshot per product plus the movements recorded after it.
+reconcile() compares that against Product.stock_quantity.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Greatest
+from django.utils.timezone import now
+
+from core.cache_utils import bump_version
+from .models import InventorySnapshot, Product, StockMovement
+
+SNAPSHOT_BATCH_SIZE = 500
+
+
+def per_product(quantities):
+    """
+    CASE expression mapping each product id in {product_id: quantity}
+    to its quantity.
+    """
+    return Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def availability_changed():
+    """
+    Bump the catalogue cache version once the current transaction commits,
+    so cached pages and their JSON-LD stop showing the old availability.
+    """
+    transaction.on_commit(lambda: bump_version("catalogue"))
+
+
+def record_movements(changes, *, kind, order=None, note=""):
+    """
+    Insert one movement per product for {product_id: signed change}.
+    Callers must already have applied the change to stock_quantity in
+    the same transaction.
+    """
+    return StockMovement.objects.bulk_create([
+        StockMovement(
+            product_id=product_id,
+            order=order,
+            kind=kind,
+            quantity=quantity,
+            note=note,
+        )
+        for product_id, quantity in changes.items()
+        if quantity
+    ])
+
+
+def take_stock(quantities, *, kind=StockMovement.SALE, order=None):
+    """
+    Remove stock for {product_id: quantity}, never going below zero, and
+    record one movement per product. Must run inside a transaction.
+
+    The rows are locked first so the recorded movements match what the
+    UPDATE actually removed.
+    """
+    if not quantities:
+        return []
+
+    on_hand = dict(
+        Product.objects
+        .select_for_update()
+        .filter(pk__in=quantities)
+        .order_by("pk")
+        .values_list("pk", "stock_quantity")
+    )
+    if not on_hand:
+        return []
+
+    Product.objects.filter(pk__in=on_hand).update(
+        stock_quantity=Greatest(F("stock_quantity") - per_product(quantities), Value(0)),
+        updated_at=now(),
+    )
+    if any(0 < stock_quantity <= quantities[pk] for pk, stock_quantity in on_hand.items()):
+        availability_changed()
+
+    return record_movements(
+        {
+            product_id: -min(quantities[product_id], stock_quantity)
+            for product_id, stock_quantity in on_hand.items()
+        },
+        kind=kind,
+        order=order,
+    )
+
+
+def return_stock(quantities, *, kind, order=None):
+    """
+    Put {product_id: quantity} back on sale (releases, refunds) and
+    record the movements. Must run inside a transaction.
+    """
+    if not quantities:
+        return []
+
+    back_on_sale = Product.objects.filter(pk__in=quantities, stock_quantity__lte=0).exists()
+    Product.objects.filter(pk__in=quantities).update(
+        stock_quantity=F("stock_quantity") + per_product(quantities),
+        updated_at=now(),
+    )
+    if back_on_sale:
+        availability_changed()
+    return record_movements(quantities, kind=kind, order=order)
+
+
+# -------------------------
+# DERIVED STOCK
+# -------------------------
+
+def _latest_snapshot(product_ref, field):
+    return Subquery(
+        InventorySnapshot.objects
+        .filter(product=product_ref)
+        .order_by("-last_movement_id", "-pk")
+        .values(field)[:1]
+    )
+
+
+def derived_stock(product_ids=None, up_to=None):
+    """
+    Return {product_id: on-hand quantity} computed from the ledger alone,
+    using each product's latest snapshot plus the movements after it
+    (up to movement id `up_to`, if given). Products with no snapshot
+    count from zero.
+
+    Two queries: the latest snapshots, then one sum over the movement
+    tails. Snapshots taken together share a high-water mark, so the tails
+    group into a few (product__in, id > mark) ranges on the
+    (product, id) index.
+    """
+    snapshots = InventorySnapshot.objects.filter(
+        pk=_latest_snapshot(OuterRef("product"), "pk"),
+    )
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        snapshots = snapshots.filter(product_id__in=product_ids)
+
+    stock = {}
+    tails = defaultdict(list)
+    for product_id, quantity, last_movement_id in snapshots.values_list(
+        "product_id", "quantity", "last_movement_id",
+    ):
+        stock[product_id] = quantity
+        tails[last_movement_id].append(product_id)
+
+    # Products without a snapshot read their whole (usually short) ledger.
+    # Movements of deleted products have no product and are skipped.
+    if product_ids is None:
+        ranges = Q(product__isnull=False) & ~Q(product_id__in=InventorySnapshot.objects.values("product_id"))
+    else:
+        ranges = Q(product_id__in=[pk for pk in product_ids if pk not in stock])
+    for last_movement_id, ids in tails.items():
+        ranges |= Q(product_id__in=ids, pk__gt=last_movement_id)
+
+    movements = StockMovement.objects.filter(ranges)
+    if up_to is not None:
+        movements = movements.filter(pk__lte=up_to)
+
+    for product_id, total in (
+        movements.order_by().values("product_id").annotate(total=Sum("quantity")).values_list("product_id", "total")
+    ):
+        stock[product_id] = stock.get(product_id, 0) + total
+    return stock
+
+
+def take_snapshots(product_ids=None):
+    """
+    Snapshot every product (or `product_ids`) so later reads only scan the
+    movements recorded afterwards. Returns the number of snapshots taken.
+
+    Products that already have a snapshot are rolled forward from the
+    ledger, so any drift from stock_quantity stays visible to reconcile().
+    Products seen for the first time start from their stock_quantity.
+    """
+    if product_ids is None:
+        product_ids = Product.objects.order_by("pk").values_list("pk", flat=True)
+    product_ids = list(product_ids)
+
+    taken = 0
+    for start in range(0, len(product_ids), SNAPSHOT_BATCH_SIZE):
+        batch = product_ids[start:start + SNAPSHOT_BATCH_SIZE]
+        with transaction.atomic():
+            # Every stock writer locks the product row before recording a
+            # movement, so once these locks are held no movement for the
+            # batch can still be in flight below the high-water mark.
+            current = dict(
+                Product.objects
+                .select_for_update()
+                .filter(pk__in=batch)
+                .order_by("pk")
+                .values_list("pk", "stock_quantity")
+            )
+            high_water = StockMovement.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+
+            known = set(
+                InventorySnapshot.objects.filter(product_id__in=current).values_list("product_id", flat=True)
+            )
+            ledger = derived_stock(known, up_to=high_water) if known else {}
+
+            InventorySnapshot.objects.bulk_create([
+                InventorySnapshot(
+                    product_id=product_id,
+                    quantity=ledger.get(product_id, 0) if product_id in known else stock_quantity,
+                    last_movement_id=high_water,
+                )
+                for product_id, stock_quantity in current.items()
+            ])
+            taken += len(current)
+    return taken
+
+
+def reconcile(product_ids=None):
+    """
+    Compare Product.stock_quantity with the ledger. Returns a list of
+    (product, ledger quantity) for every product out of balance; products
+    without a snapshot are skipped.
+    """
+    snapshotted = InventorySnapshot.objects.values("product_id")
+    products = Product.objects.filter(pk__in=snapshotted).only("pk", "title", "stock_quantity")
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+
+    ledger = derived_stock(product_ids)
+    return [
+        (product, ledger.get(product.pk, 0))
+        for product in products
+        if ledger.get(product.pk, 0) != product.stock_quantity
+    ]
@@ -1,13 +1,66 @@
+import hashlib
+
+from django.conf import settings
 from django.views.generic import ListView, DetailView
-from django.db.models import Q, F
+from django.db.models import F
+from django.http import Http404
 from django.shortcuts import redirect
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date, quote_etag
 
+from core.page_cache import basket_fragment, cache_storefront_page, content_versions
+from products.facets import attribute_filters, build_facets, facet_counts
 from products.models import Product
+from products.pagination import InvalidCursor, paginate_keyset
+from products.search import search_products
 from home.models import HomePage
 
 
-class ProductListView(ListView):
+class ConditionalGetMixin:
+    """
+    Answers conditional GETs with a 304 before anything is rendered.
+
+    The validator combines the product state returned by
+    get_validator_state() with the singleton/SEO cache versions and the
+    basket fragment, since all of them appear on the page.
+    """
+    # Set on pages that also render catalogue-wide content (carousels).
+    include_catalogue_version = False
+
+    def get_validator_state(self):
+        """
+        Return (last_modified datetime or None, list of extra etag parts).
+        Runs on every request that reaches the view, so keep it to at most
+        one cheap query.
+        """
+        raise NotImplementedError(
+            "subclasses of ConditionalGetMixin must provide a get_validator_state() method"
+        )
+
+    def get(self, request, *args, **kwargs):
+        last_modified, parts = self.get_validator_state()
+        parts = [str(last_modified), *map(str, parts), basket_fragment(request)]
+        parts += content_versions(catalogue=self.include_catalogue_version)
+        etag = quote_etag(hashlib.md5(":".join(parts).encode()).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response.headers.setdefault("ETag", etag)
+            if timestamp:
+                response.headers.setdefault("Last-Modified", http_date(timestamp))
+        return response
+
+
+@method_decorator(cache_storefront_page(settings.CATALOGUE_CACHE_SECONDS), name="dispatch")
+class ProductListView(ConditionalGetMixin, ListView):
     model = Product
     template_name = "products.html"
     context_object_name = "products"
@@ -18,7 +71,23 @@ class ProductListView(ListView):
     product_type_filter = None
     special_filter = None
 
-    def get_queryset(self):
+    # Page by (title, id) keyset instead of OFFSET. Also enabled per
+    # request with ?cursor= (an empty cursor is the first page).
+    cursor_pagination = False
+
+    # get_base_queryset() result, shared by the listing and the facets.
+    _base_queryset = None
+
+    def get_base_queryset(self):
+        """
+        Products for this page before the sidebar (attribute) filters.
+        Built once per request: on SQLite a search runs its FTS query here.
+        """
+        if self._base_queryset is None:
+            self._base_queryset = self.build_base_queryset()
+        return self._base_queryset
+
+    def build_base_queryset(self):
         qs = Product.objects.all()
 
         # ----- Product type filter -----
@@ -32,38 +101,69 @@ class ProductListView(ListView):
             last_week = timezone.now() - timezone.timedelta(days=7)
             qs = qs.filter(created_at__gte=last_week)
 
-        # ----- GET filters for search form -----
+        # ----- Search -----
         search = self.request.GET.get("search", "").strip()
         if search:
-            qs = qs.filter(Q(title__icontains=search) | Q(description__icontains=search))
-
-        scent = self.request.GET.get("scent")
-        if scent:
-            qs = qs.filter(scent=scent)
+            qs = search_products(qs, search)
 
-        size = self.request.GET.get("size")
-        if size:
-            qs = qs.filter(size=size)
+        return qs
 
-        color = self.request.GET.get("color")
-        if color:
-            qs = qs.filter(color=color)
+    def get_queryset(self):
+        qs = self.get_base_queryset()
 
-        price = self.request.GET.get("price")
-        if price:
-            try:
-                price_val = float(price)
-                qs = qs.filter(price__lte=price_val)
-            except ValueError:
-                pass
+        # ----- GET filters for search form -----
+        for facet_filter in attribute_filters(self.request.GET).values():
+            qs = qs.filter(facet_filter)
 
+        # Search results keep their relevance ordering
+        if self.request.GET.get("search", "").strip():
+            return qs
         return qs.order_by("title")
 
+    def use_cursor_pagination(self):
+        # Relevance-ordered search results have no stable keyset
+        if self.request.GET.get("search", "").strip():
+            return False
+        return self.cursor_pagination or "cursor" in self.request.GET
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+
+        try:
+            page = paginate_keyset(queryset, self.request.GET.get("cursor", ""), page_size)
+        except InvalidCursor:
+            raise Http404("Invalid page cursor")
+        return (None, page, page.object_list, page.has_other_pages())
+
+    def get_facets(self):
+        counts = facet_counts(
+            self.get_base_queryset(),
+            self.request.GET,
+            cache_parts=(
+                self.product_type_filter,
+                self.special_filter,
+                self.request.GET.get("search", "").strip(),
+            ),
+        )
+        return build_facets(counts, self.request.GET)
+
+    # Every product save/delete bumps the catalogue version, which covers
+    # anything a listing renders, so the validator needs no query at all
+    # (offset and cursor pages alike; the page/cursor is in the URL).
+    include_catalogue_version = True
+
+    def get_validator_state(self):
+        if self.special_filter == "new":
+            # Products age out of the "new" listing without being saved.
+            return None, [timezone.now().strftime("%Y%m%d%H")]
+        return None, []
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update({
             "page_title": self.page_title,
-            "home": HomePage.objects.first(),
+            "home": HomePage.objects.get_solo(),
             "selected": {
                 "search": self.request.GET.get("search", ""),
                 "scent": self.request.GET.get("scent", ""),
@@ -72,6 +172,7 @@ class ProductListView(ListView):
                 "price": self.request.GET.get("price", ""),
                 "type": self.product_type_filter,
             },
+            "facets": self.get_facets(),
             "scent_choices": Product.Scent.choices,
             "size_choices": Product.Size.choices,
             "color_choices": Product.Color.choices,
@@ -80,16 +181,33 @@ class ProductListView(ListView):
         return context
 
 
-class ProductDetailView(DetailView):
+@method_decorator(cache_storefront_page(settings.CATALOGUE_CACHE_SECONDS), name="dispatch")
+class ProductDetailView(ConditionalGetMixin, DetailView):
     model = Product
     template_name = "product_detail.html"
     slug_field = "slug"
     slug_url_kwarg = "product_slug"
+    include_catalogue_version = True
+
+    # Loaded by get_validator_state(), so a full GET fetches the row once.
+    _product = None
+
+    def get_validator_state(self):
+        try:
+            self._product = self.get_object()
+        except Http404:
+            return None, ["missing"]
+        return self._product.updated_at, [self._product.pk]
+
+    def get_object(self, queryset=None):
+        if queryset is None and self._product is not None:
+            return self._product
+        return super().get_object(queryset)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update({
-            "home": HomePage.objects.first(),
+            "home": HomePage.objects.get_solo(),
             "meta": self.object.meta,
         })
         return context
@@ -98,9 +216,5 @@ class ProductDetailView(DetailView):
         self.object = self.get_object()
         quantity = max(1, int(request.POST.get("quantity", 1)))
 
-        basket = request.session.get("basket", {})
-        key = str(self.object.pk)
-        basket[key] = basket.get(key, 0) + quantity
-
-        request.session["basket"] = basket
+        request.basket.add(self.object.pk, quantity)
         return redirect(self.object.get_absolute_url())
@@ -1,14 +1,14 @@
-from .models import PageSEO
+from django.utils.functional import SimpleLazyObject
+
+from .registry import get_page_meta
+
 
 def seo_meta(request):
     """
     Returns the SEO object for the current path (static page).
-    Can be used in templates as 'meta'.
+    Can be used in templates as 'meta'. The lookup only runs if the
+    template renders it and the view has not supplied its own meta, and
+    is answered from the in-process registry (see seo/registry.py).
     """
     path = request.path
-    try:
-        seo_obj = PageSEO.objects.get(url_path=path)
-        meta = seo_obj.meta
-    except PageSEO.DoesNotExist:
-        meta = None
-    return {"meta": meta}
\ No newline at end of file
+    return {"meta": SimpleLazyObject(lambda: get_page_meta(path))}
@@ -2,6 +2,8 @@ from django.db import models
 from django.conf import settings
 import json
 
+from core.cache_utils import get_or_set
+
 
 def default_json_ld():
     data = {
@@ -155,6 +157,12 @@ class PageSEO(models.Model):
     # -----------------
     @property
     def meta(self):
+        """
+        Cached until the next PageSEO save bumps the "page_seo" version.
+        """
+        return get_or_set("page_seo", "meta", self.pk, loader=self.build_meta)
+
+    def build_meta(self):
         site_url = getattr(settings, "SITE_URL", "https://lelseasmelts.com")
         canonical = self.canonical_url or f"{site_url}{self.url_path}"
 
@@ -0,0 +1,41 @@
+"""
+In-process registry of PageSEO metadata, keyed by URL path.
+
+There are only ever a handful of PageSEO rows (one per STATIC_PAGE_CHOICES
+entry), so each worker loads all of them at once and answers lookups from
+a dict; paths without an entry are simply absent, so misses cost nothing
+either. Each lookup compares the registry against the "page_seo" version
+token, which PageSEO post_save/post_delete bump, so every worker reloads
+after an edit.
+"""
+from core.cache_utils import get_version
+from .models import PageSEO
+
+NAMESPACE = "page_seo"
+
+# (version, {url_path: meta}) for the lifetime of the worker.
+_registry = (None, {})
+
+
+def _load():
+    return {page.url_path: page.build_meta() for page in PageSEO.objects.all()}
+
+
+def get_page_meta(path):
+    """
+    Return the meta dict for `path`, or None if it has no PageSEO entry.
+    """
+    global _registry
+
+    version = get_version(NAMESPACE)
+    loaded_version, pages = _registry
+    if loaded_version != version:
+        pages = _load()
+        # Swap in one assignment so concurrent threads never see a partial dict.
+        _registry = (version, pages)
+    return pages.get(path)
+
+
+def invalidate():
+    global _registry
+    _registry = (None, {})
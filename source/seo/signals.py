@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache_utils import bump_version
+from . import registry
+from .models import PageSEO
+
+
+@receiver([post_save, post_delete], sender=PageSEO)
+def invalidate_page_seo(sender, **kwargs):
+    registry.invalidate()
+    bump_version(registry.NAMESPACE)